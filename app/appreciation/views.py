@@ -10,9 +10,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.appreciation.models import Appreciation
-from app.athlete.models import Athlete
+from app.athlete.models import Athlete, is_public_target
 from app.auth.service import authenticate_request
 from app.cf_games.constants import DEFAULT_APPRECIATION_SCORE
+from app.cf_games.service import recompute_athlete_event_scores
 from app.database.dependencies import db_dependency
 from app.exceptions import unauthorised_exception
 from app.ui.template import templates
@@ -58,6 +59,7 @@ async def post_create_appreciation_record(
     appreciation.score = score
     db_session.add(appreciation)
     await db_session.commit()
+    await recompute_athlete_event_scores(db_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
 
     return await return_partial_appreciation_table(
         request=request,
@@ -84,6 +86,7 @@ async def delete_appreciation_record(
     appreciation = await Appreciation.find(async_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
     if appreciation:
         await appreciation.delete(async_session=db_session)
+        await recompute_athlete_event_scores(db_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
 
     return await return_partial_appreciation_table(
         request=request,
@@ -105,7 +108,7 @@ async def return_partial_appreciation_table(
     result = await db_session.execute(appreciation_stmt)
     appreciation = result.mappings().all()
 
-    athlete_stmt = select(Athlete.name, Athlete.id).order_by(Athlete.name)
+    athlete_stmt = select(Athlete.name, Athlete.id).where(is_public_target()).order_by(Athlete.name)
     result = await db_session.execute(athlete_stmt)
     athletes = result.mappings().all()
 
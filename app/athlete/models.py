@@ -2,11 +2,11 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Integer, String
+from sqlalchemy import ColumnElement, Index, Integer, String, UniqueConstraint, desc
 from sqlalchemy.engine.default import DefaultExecutionContext
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.cf_games.constants import CF_DIVISION_MAP, MF_MASTERS_AGE_CUTOFF, MF_OPEN_AGE_CUTOFF
+from app.cf_games.constants import AFFILIATE_ID, CF_DIVISION_MAP, MF_MASTERS_AGE_CUTOFF, MF_OPEN_AGE_CUTOFF, YEAR
 from app.database.base import Base
 
 if TYPE_CHECKING:
@@ -22,12 +22,33 @@ def apply_mf_age_category(context: DefaultExecutionContext) -> str:
     return "1. Open"
 
 
+def normalize_name(name: str | None) -> str:
+    """Casefolded, whitespace-collapsed name used to match judges to athletes."""
+    return " ".join((name or "").casefold().split())
+
+
+def apply_name_key(context: DefaultExecutionContext) -> str:
+    return normalize_name(context.get_current_parameters()["name"])
+
+
 def apply_division_name(context: DefaultExecutionContext) -> str:
     division_id = context.get_current_parameters()["division_id"]
     return CF_DIVISION_MAP[str(division_id)]
 
 
 class Athlete(Base):
+    __table_args__ = (
+        UniqueConstraint("competitor_id", "year"),
+        # Ingest loads and fingerprints athletes per (year, affiliate)
+        Index("ix_athlete_year_affiliate_id", "year", "affiliate_id"),
+        # Judge scoring matches judge keys to athletes of the same year and affiliate
+        Index("ix_athlete_name_key_year_affiliate_id", "name_key", "year", "affiliate_id"),
+        # Team member lists order by team, leaders first, then name
+        Index("ix_athlete_team_name_team_leader_name", "team_name", desc("team_leader"), "name"),
+        # Team composition groups and auto assign filters by team, category and gender
+        Index("ix_athlete_team_name_mf_age_category_gender", "team_name", "mf_age_category", "gender"),
+    )
+
     # PK / FK
     competitor_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     year: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -47,5 +68,16 @@ class Athlete(Base):
     team_name: Mapped[str] = mapped_column(String, default="zz")
     team_leader: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Calculated columns
+    name_key: Mapped[str | None] = mapped_column(String, nullable=True, index=True, default=apply_name_key)
+
+    # Content hash of the CF entrant payload
+    fingerprint: Mapped[str | None] = mapped_column(String, nullable=True)
+
     # Relationships
     scores: Mapped[list[Score]] = relationship(back_populates="athlete")
+
+
+def is_public_target() -> ColumnElement[bool]:
+    """Athletes of the configured affiliate and year, the only target the public pages and rankings show."""
+    return (Athlete.year == YEAR) & (Athlete.affiliate_id == AFFILIATE_ID)
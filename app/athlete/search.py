@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.athlete.models import Athlete, is_public_target
+from app.cf_games.constants import ATHLETE_SEARCH_LIMIT
+from app.database.generation import data_generation
+
+# Names are indexed by every substring up to this length, longer queries intersect their grams of this length
+GRAM_SIZE = 3
+
+
+def name_grams(name: str, size: int) -> set[str]:
+    return {name[i : i + size] for i in range(len(name) - size + 1)}
+
+
+def match_rank(name: str, query: str) -> int:
+    """Exact name, then name prefix, then word prefix, then anywhere in the name."""
+    if name == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    if f" {query}" in name:
+        return 2
+    return 3
+
+
+class AthleteSearchIndex:
+    """
+    Athlete names with their team, for the admin typeahead searches. Rebuilt once per data generation.
+
+    Names are casefolded and indexed by every substring of up to GRAM_SIZE characters, so a keystroke intersects a few
+    posting sets and checks only the names holding all of the query's grams, instead of every athlete.
+    """
+
+    def __init__(self) -> None:
+        self.generation: int | None = None
+        self.athletes: list[dict[str, Any]] = []
+        self.names: list[str] = []
+        self.postings: dict[str, set[int]] = {}
+        self.lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.generation != data_generation.value
+
+    async def refresh(self, db_session: AsyncSession) -> None:
+        async with self.lock:
+            if not self.stale:
+                return
+            generation = data_generation.value
+            stmt = (
+                select(
+                    Athlete.id,
+                    Athlete.name,
+                    Athlete.competitor_id,
+                    Athlete.team_name,
+                    Athlete.team_leader,
+                )
+                .where(is_public_target())
+                .order_by(Athlete.name)
+            )
+            ret = await db_session.execute(stmt)
+            self.athletes = [dict(x) for x in ret.mappings().all()]
+            self.names = [x["name"].casefold() for x in self.athletes]
+            self.postings = {}
+            for position, name in enumerate(self.names):
+                for size in range(1, GRAM_SIZE + 1):
+                    for gram in name_grams(name, size):
+                        self.postings.setdefault(gram, set()).add(position)
+            self.generation = generation
+
+    def candidates(self, query: str) -> set[int]:
+        postings = sorted(
+            (self.postings.get(gram, set()) for gram in name_grams(query, min(len(query), GRAM_SIZE))),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+        return candidates
+
+    async def search(
+        self,
+        db_session: AsyncSession,
+        name: str,
+        limit: int = ATHLETE_SEARCH_LIMIT,
+    ) -> list[dict[str, Any]]:
+        """Up to limit athletes whose name contains name, best matches first, then by name. Everyone when empty."""
+        if self.stale:
+            await self.refresh(db_session=db_session)
+        query = name.strip().casefold()
+        if not query:
+            # The admin pages load with an empty name and list the whole roster
+            return list(self.athletes)
+        matches = (x for x in self.candidates(query) if query in self.names[x])
+        best = heapq.nsmallest(limit, matches, key=lambda x: (match_rank(self.names[x], query), x))
+        return [self.athletes[x] for x in best]
+
+
+athlete_search_index = AthleteSearchIndex()
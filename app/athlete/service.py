@@ -6,12 +6,13 @@ from random import choice
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import func, select, text, update
+from sqlalchemy import Select, func, select, text, update
 
-from app.athlete.models import Athlete
+from app.athlete.models import Athlete, is_public_target
 from app.cf_games.constants import AFFILIATE_ID, IGNORE_TEAMS, TEAM_LEADER_MAP, YEAR
 from app.database.dependencies import db_dependency
 from app.score.models import SideScore
+from app.score.service import rebuild_score_read_models
 
 log = logging.getLogger("uvicorn.error")
 
@@ -26,13 +27,32 @@ async def get_year_affiliate_athletes(
     return list(result.scalars())
 
 
+def team_assignments_export_stmt() -> Select:
+    return (
+        select(
+            Athlete.name,
+            Athlete.competitor_id,
+            Athlete.gender,
+            Athlete.mf_age_category,
+            Athlete.team_name,
+            Athlete.team_leader,
+        )
+        .where(is_public_target())
+        .order_by(Athlete.team_name, Athlete.team_leader.desc(), Athlete.name)
+    )
+
+
 async def get_athlete_teams_list(
     db_session: db_dependency,
 ) -> list[dict[str, Any]]:
-    stmt = select(Athlete.name, Athlete.competitor_id, Athlete.team_name, Athlete.team_leader).order_by(
-        Athlete.team_name,
-        Athlete.team_leader.desc(),
-        Athlete.name,
+    stmt = (
+        select(Athlete.name, Athlete.competitor_id, Athlete.team_name, Athlete.team_leader)
+        .where(is_public_target())
+        .order_by(
+            Athlete.team_name,
+            Athlete.team_leader.desc(),
+            Athlete.name,
+        )
     )
     ret = await db_session.execute(stmt)
     return [dict(x) for x in ret.mappings().all()]
@@ -48,6 +68,7 @@ async def get_team_composition_dict(
             Athlete.mf_age_category,
             func.count().label("count"),
         )
+        .where(is_public_target())
         .group_by(
             Athlete.team_name,
             Athlete.gender,
@@ -75,16 +96,20 @@ async def get_team_composition_dict(
 async def get_athlete_teams_dict(
     db_session: db_dependency,
 ) -> dict[str, list[str]]:
-    stmt = select(
-        Athlete.name,
-        Athlete.team_name,
-        Athlete.team_leader,
-        Athlete.gender,
-        Athlete.mf_age_category,
-    ).order_by(
-        Athlete.team_name,
-        Athlete.team_leader.desc(),
-        Athlete.name,
+    stmt = (
+        select(
+            Athlete.name,
+            Athlete.team_name,
+            Athlete.team_leader,
+            Athlete.gender,
+            Athlete.mf_age_category,
+        )
+        .where(is_public_target())
+        .order_by(
+            Athlete.team_name,
+            Athlete.team_leader.desc(),
+            Athlete.name,
+        )
     )
     ret = await db_session.execute(stmt)
     teams = {}
@@ -105,18 +130,19 @@ async def assign_athlete_to_team(
     team_name: str,
     tl_c: str,
 ) -> None:
-    athlete = await Athlete.find(async_session=db_session, competitor_id=competitor_id)
+    athlete = await Athlete.find(async_session=db_session, competitor_id=competitor_id, year=YEAR)
     if athlete:
         athlete.team_name = team_name
         athlete.team_leader = TEAM_LEADER_MAP.get(tl_c, 0)
         db_session.add(athlete)
+        await rebuild_score_read_models(db_session=db_session)
         await db_session.commit()
 
 
 async def get_team_names(
     db_session: db_dependency,
 ) -> list[str]:
-    stmt = select(Athlete.team_name).distinct().order_by(Athlete.team_name)
+    stmt = select(Athlete.team_name).where(is_public_target()).distinct().order_by(Athlete.team_name)
     ret = await db_session.execute(stmt)
     result = ret.scalars()
     return list(result)
@@ -127,12 +153,17 @@ async def rename_team(
     team_name_current: str,
     team_name_new: str,
 ) -> None:
-    athlete_update_stmt = update(Athlete).where(Athlete.team_name == team_name_current).values(team_name=team_name_new)
+    athlete_update_stmt = (
+        update(Athlete)
+        .where(is_public_target() & (Athlete.team_name == team_name_current))
+        .values(team_name=team_name_new)
+    )
     await db_session.execute(athlete_update_stmt)
     side_score_update_stmt = (
         update(SideScore).where(SideScore.team_name == team_name_current).values(team_name=team_name_new)
     )
     await db_session.execute(side_score_update_stmt)
+    await rebuild_score_read_models(db_session=db_session)
     await db_session.commit()
 
 
@@ -146,7 +177,10 @@ async def random_assign_zz_athlete(
         while True:
             # Get all assignable athletes for category
             athlete_stmt = select(Athlete).where(
-                (Athlete.team_name == "zz") & (Athlete.gender == gender) & (Athlete.mf_age_category == age_cat),
+                is_public_target()
+                & (Athlete.team_name == "zz")
+                & (Athlete.gender == gender)
+                & (Athlete.mf_age_category == age_cat),
             )
             result = await db_session.execute(athlete_stmt)
             athletes = result.scalars().all()
@@ -158,7 +192,7 @@ async def random_assign_zz_athlete(
                 # Pick team that should get a person next
                 select_team_stmt = (
                     select(Athlete.team_name, func.count().label("count"))
-                    .where(Athlete.team_name.not_in(IGNORE_TEAMS))
+                    .where(is_public_target() & Athlete.team_name.not_in(IGNORE_TEAMS))
                     .group_by(Athlete.team_name)
                     .order_by(text("count ASC"), Athlete.team_name)
                 ).limit(1)
@@ -172,3 +206,6 @@ async def random_assign_zz_athlete(
 
             else:
                 break
+
+    await rebuild_score_read_models(db_session=db_session)
+    await db_session.commit()
@@ -4,9 +4,10 @@ import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Form, Request, Response, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 
 from app.athlete.models import Athlete
+from app.athlete.search import athlete_search_index
 from app.athlete.service import (
     assign_athlete_to_team,
     get_athlete_teams_dict,
@@ -15,11 +16,14 @@ from app.athlete.service import (
     get_team_names,
     random_assign_zz_athlete,
     rename_team,
+    team_assignments_export_stmt,
 )
 from app.auth.service import authenticate_request
-from app.cf_games.constants import TEAM_LEADER_REVERSE_MAP
+from app.cf_games.constants import TEAM_LEADER_REVERSE_MAP, YEAR
 from app.database.dependencies import db_dependency
 from app.exceptions import not_found_exception, unauthorised_exception
+from app.ui.cache import cached_fragment
+from app.ui.export import ExportFormat, export_response
 from app.ui.template import templates
 
 log = logging.getLogger("uvicorn.error")
@@ -28,6 +32,7 @@ athlete_router = APIRouter()
 
 
 @athlete_router.get("/team_members", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@cached_fragment
 async def get_team_members(request: Request, db_session: db_dependency) -> Response:
     teams = await get_athlete_teams_dict(db_session=db_session)
     team_composition = await get_team_composition_dict(db_session=db_session)
@@ -97,7 +102,7 @@ async def get_athlete_team_assign_partial(competitor_id: int, request: Request,
     if not user:
         raise unauthorised_exception()
 
-    athlete = await Athlete.find_or_raise(async_session=db_session, competitor_id=competitor_id)
+    athlete = await Athlete.find_or_raise(async_session=db_session, competitor_id=competitor_id, year=YEAR)
     return templates.TemplateResponse(
         request=request,
         name="partials/athlete_team_assign_form.jinja2",
@@ -117,10 +122,12 @@ async def get_athlete_teams_partial(
     if not user:
         raise unauthorised_exception()
 
-    athlete_teams = await get_athlete_teams_list(db_session=db_session)
-    filtered_teams = [x for x in athlete_teams if name.casefold() in x.get("name", "").casefold()]
-    for x in filtered_teams:
-        x["tl_c"] = TEAM_LEADER_REVERSE_MAP.get(x.get("team_leader", 0), "")
+    if name.strip():
+        athletes = await athlete_search_index.search(db_session=db_session, name=name)
+    else:
+        # The page loads with an empty name and lists the whole roster by team
+        athletes = await get_athlete_teams_list(db_session=db_session)
+    filtered_teams = [{**x, "tl_c": TEAM_LEADER_REVERSE_MAP.get(x.get("team_leader", 0), "")} for x in athletes]
     return templates.TemplateResponse(
         request=request,
         name="partials/athlete_teams_tbody.jinja2",
@@ -197,3 +204,8 @@ async def post_auto_assign_teams(
             "url": "/team_members",
         },
     )
+
+
+@athlete_router.get("/team_assignments/export/{export_format}", status_code=status.HTTP_200_OK)
+async def get_team_assignments_export(export_format: ExportFormat) -> StreamingResponse:
+    return export_response(stmt=team_assignments_export_stmt(), export_format=export_format, name="team_assignments")
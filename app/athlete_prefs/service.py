@@ -4,10 +4,10 @@ import logging
 import random
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.athlete.models import Athlete
+from app.athlete.models import Athlete, is_public_target
 from app.athlete_prefs.constants import RX_PREFS, TIME_PREFS
 from app.athlete_prefs.models import AthleteRXPref, AthleteTimePref
 
@@ -17,23 +17,31 @@ log = logging.getLogger("uvicorn.error")
 async def get_athlete_prefs(
     db_session: AsyncSession,
 ) -> dict[str, dict[str, Any]]:
-    rx_pref_stmt = select(Athlete.name, AthleteRXPref.athlete_id, AthleteRXPref.rx_pref).join_from(
-        AthleteRXPref,
-        Athlete,
-        Athlete.id == AthleteRXPref.athlete_id,
+    rx_pref_stmt = (
+        select(Athlete.name, AthleteRXPref.athlete_id, AthleteRXPref.rx_pref)
+        .join_from(
+            AthleteRXPref,
+            Athlete,
+            Athlete.id == AthleteRXPref.athlete_id,
+        )
+        .where(is_public_target())
     )
     ret = await db_session.execute(rx_pref_stmt)
     athlete_rx_pref = ret.mappings().all()
 
-    time_pref_stmt = select(
-        Athlete.name,
-        AthleteTimePref.athlete_id,
-        AthleteTimePref.preference_nbr,
-        AthleteTimePref.preference,
-    ).join_from(
-        AthleteTimePref,
-        Athlete,
-        Athlete.id == AthleteTimePref.athlete_id,
+    time_pref_stmt = (
+        select(
+            Athlete.name,
+            AthleteTimePref.athlete_id,
+            AthleteTimePref.preference_nbr,
+            AthleteTimePref.preference,
+        )
+        .join_from(
+            AthleteTimePref,
+            Athlete,
+            Athlete.id == AthleteTimePref.athlete_id,
+        )
+        .where(is_public_target())
     )
     ret = await db_session.execute(time_pref_stmt)
     athlete_time_pref = ret.mappings().all()
@@ -54,7 +62,9 @@ async def random_assign_athlete_prefs(
     time_prefs: list[str] = TIME_PREFS,
 ) -> None:
     rx_pref_stmt = select(AthleteRXPref.athlete_id)
-    missing_time_stmt = select(Athlete.id).where(Athlete.id.not_in(rx_pref_stmt.scalar_subquery()))
+    missing_time_stmt = select(Athlete.id).where(
+        is_public_target() & Athlete.id.not_in(rx_pref_stmt.scalar_subquery()),
+    )
     ret = await db_session.execute(missing_time_stmt)
     results = ret.scalars().all()
 
@@ -63,7 +73,9 @@ async def random_assign_athlete_prefs(
         db_session.add(rx_pref)
 
     time_pref_stmt = select(AthleteTimePref.athlete_id)
-    missing_time_stmt = select(Athlete.id).where(Athlete.id.not_in(time_pref_stmt.scalar_subquery()))
+    missing_time_stmt = select(Athlete.id).where(
+        is_public_target() & Athlete.id.not_in(time_pref_stmt.scalar_subquery()),
+    )
     ret = await db_session.execute(missing_time_stmt)
     results = ret.scalars().all()
 
@@ -78,8 +90,8 @@ async def random_assign_athlete_prefs(
     await db_session.commit()
 
 
-async def get_athlete_prefs_data_dump(db_session: AsyncSession) -> list[dict[str, Any]]:
-    rx_pref_stmt = (
+def athlete_prefs_export_stmt() -> Select:
+    return (
         select(
             Athlete.name,
             Athlete.mf_age_category,
@@ -100,10 +112,13 @@ async def get_athlete_prefs_data_dump(db_session: AsyncSession) -> list[dict[str
             AthleteTimePref,
             Athlete.id == AthleteTimePref.athlete_id,
         )
+        .where(is_public_target())
         .order_by(Athlete.name, AthleteTimePref.preference_nbr)
     )
 
-    ret = await db_session.execute(rx_pref_stmt)
+
+async def get_athlete_prefs_data_dump(db_session: AsyncSession) -> list[dict[str, Any]]:
+    ret = await db_session.execute(athlete_prefs_export_stmt())
     results = ret.mappings().all()
 
     return [dict(x) for x in results]
@@ -5,17 +5,18 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Form, Request, Response, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy import delete, select, update
 
-from app.athlete.models import Athlete
+from app.athlete.models import Athlete, is_public_target
 from app.athlete_prefs.constants import RX_PREFS, TIME_PREFS
 from app.athlete_prefs.models import AthleteRXPref, AthleteTimePref
 from app.athlete_prefs.schemas import AthletePrefsModel
-from app.athlete_prefs.service import get_athlete_prefs_data_dump
+from app.athlete_prefs.service import athlete_prefs_export_stmt, get_athlete_prefs_data_dump
 from app.cf_games.constants import IGNORE_TEAMS
 from app.database.dependencies import db_dependency
 from app.exceptions import not_found_exception
+from app.ui.export import ExportFormat, export_response
 from app.ui.template import templates
 
 log = logging.getLogger("uvicorn.error")
@@ -25,7 +26,11 @@ athlete_prefs_router = APIRouter()
 
 @athlete_prefs_router.get("/athlete_prefs_page", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_athlete_prefs_page(request: Request, db_session: db_dependency) -> Response:
-    stmt = select(Athlete.id, Athlete.name).where(Athlete.team_name.not_in(IGNORE_TEAMS)).order_by(Athlete.name)
+    stmt = (
+        select(Athlete.id, Athlete.name)
+        .where(is_public_target() & Athlete.team_name.not_in(IGNORE_TEAMS))
+        .order_by(Athlete.name)
+    )
     ret = await db_session.execute(stmt)
     athletes = ret.mappings().all()
 
@@ -138,3 +143,8 @@ async def get_athlete_prefs_download(
 ) -> list[AthletePrefsModel]:
     prefs = await get_athlete_prefs_data_dump(db_session=db_session)
     return [AthletePrefsModel.model_validate(x) for x in prefs]
+
+
+@athlete_prefs_router.get("/athlete_prefs/export/{export_format}", status_code=status.HTTP_200_OK)
+async def get_athlete_prefs_export(export_format: ExportFormat) -> StreamingResponse:
+    return export_response(stmt=athlete_prefs_export_stmt(), export_format=export_format, name="athlete_prefs")
@@ -4,7 +4,7 @@ import logging
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 
 from app.athlete.models import Athlete
 from app.attendance.models import Attendance
@@ -13,31 +13,22 @@ from app.database.dependencies import db_dependency
 log = logging.getLogger("uvicorn.error")
 
 
-async def get_athlete_attendance_data(
-    db_session: db_dependency,
-) -> dict[UUID, dict[Any, Any]]:
-    stmt = (
-        select(Athlete.name, Athlete.id, Attendance.ordinal, Attendance.event_name)
-        .join_from(
-            Athlete,
-            Attendance,
-            Athlete.id == Attendance.athlete_id,
-            isouter=True,
-        )
+def attendance_export_stmt() -> Select:
+    return (
+        select(Athlete.name, Athlete.team_name, Attendance.ordinal, Attendance.event_name)
+        .join_from(Athlete, Attendance, Athlete.id == Attendance.athlete_id)
         .order_by(Athlete.name, Attendance.ordinal)
     )
-    ret = await db_session.execute(stmt)
-    results = ret.mappings().all()
-    attendance = {}
-    for row in results:
-        id_ = row.get("id")
-        name = row.get("name")
-        ordinal = row.get("ordinal")
-        if id_ and id_ not in attendance:
-            attendance[id_] = {}
-        if name:
-            attendance[id_]["name"] = name
-        if ordinal:
-            attendance[id_][ordinal] = True
 
+
+async def get_athletes_attendance(
+    db_session: db_dependency,
+    athletes: list[dict[str, Any]],
+) -> dict[UUID, dict[Any, Any]]:
+    """Events attended by each of these athletes, keyed by athlete id in their order."""
+    attendance = {x["id"]: {"name": x["name"]} for x in athletes}
+    stmt = select(Attendance.athlete_id, Attendance.ordinal).where(Attendance.athlete_id.in_(attendance))
+    ret = await db_session.execute(stmt)
+    for row in ret.all():
+        attendance[row.athlete_id][row.ordinal] = True
     return attendance
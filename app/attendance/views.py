@@ -5,13 +5,16 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Form, Request, Response, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 
 from app.attendance.models import Attendance
-from app.attendance.service import get_athlete_attendance_data
+from app.athlete.search import athlete_search_index
+from app.attendance.service import attendance_export_stmt, get_athletes_attendance
 from app.auth.service import authenticate_request
+from app.cf_games.service import recompute_athlete_event_scores
 from app.database.dependencies import db_dependency
 from app.exceptions import unauthorised_exception
+from app.ui.export import ExportFormat, export_response
 from app.ui.template import templates
 
 log = logging.getLogger("uvicorn.error")
@@ -41,13 +44,13 @@ async def get_athlete_attendance_table(
     if not user:
         raise unauthorised_exception()
 
-    attendance = await get_athlete_attendance_data(db_session=db_session)
-    filtered_attendance = {k: v for k, v in attendance.items() if name.casefold() in v.get("name", "").casefold()}
+    athletes = await athlete_search_index.search(db_session=db_session, name=name)
+    attendance = await get_athletes_attendance(db_session=db_session, athletes=athletes)
     return templates.TemplateResponse(
         request=request,
         name="partials/athlete_attendance_tbody.jinja2",
         context={
-            "attendance": filtered_attendance,
+            "attendance": attendance,
         },
     )
 
@@ -70,6 +73,7 @@ async def post_create_new_attendance_record(
     attendance = await Attendance.find(async_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
     if not attendance:
         await Attendance(athlete_id=athlete_id, ordinal=ordinal).save(async_session=db_session)
+        await recompute_athlete_event_scores(db_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
 
     return templates.TemplateResponse(
         request=request,
@@ -99,6 +103,7 @@ async def delete_attendance_record(
     attendance = await Attendance.find(async_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
     if attendance:
         await attendance.delete(async_session=db_session)
+        await recompute_athlete_event_scores(db_session=db_session, athlete_id=athlete_id, ordinal=ordinal)
 
     return templates.TemplateResponse(
         request=request,
@@ -108,3 +113,15 @@ async def delete_attendance_record(
             "ordinal": ordinal,
         },
     )
+
+
+@attendance_router.get("/attendance/export/{export_format}", status_code=status.HTTP_200_OK)
+async def get_attendance_export(
+    request: Request,
+    export_format: ExportFormat,
+) -> StreamingResponse:
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    return export_response(stmt=attendance_export_stmt(), export_format=export_format, name="attendance")
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
+
+import aiofiles
+from httpx import HTTPError, codes
+
+from app.cf_games.constants import CF_CACHE_DIRECTORY, CF_CACHE_FALLBACK_TIMEOUT_SECONDS
+
+if TYPE_CHECKING:
+    from app.cf_games.client import CFApiClient
+
+log = logging.getLogger("uvicorn.error")
+
+
+class CFCacheMissError(Exception):
+    pass
+
+
+class CFResponseCache:
+    """On-disk cache of CF leaderboard pages keyed by (year, affiliate, division, page)."""
+
+    def __init__(self, directory: str = CF_CACHE_DIRECTORY) -> None:
+        self.directory = Path(directory)
+
+    def path(self, key: tuple[int, int, int, int]) -> Path:
+        year, affiliate, division, page = key
+        return self.directory / str(year) / str(affiliate) / str(division) / f"{page}.json"
+
+    async def read(self, key: tuple[int, int, int, int]) -> dict[str, Any] | None:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        async with aiofiles.open(path) as f:
+            return json.loads(await f.read())
+
+    async def write(self, key: tuple[int, int, int, int], entry: dict[str, Any]) -> None:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, so concurrent fetches of one page never write into the same file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{uuid4().hex}.tmp")
+        async with aiofiles.open(tmp_path, "w") as f:
+            await f.write(json.dumps(entry))
+        os.replace(tmp_path, path)  # noqa: PTH105
+
+    async def fetch(
+        self,
+        cf_client: CFApiClient,
+        url: str,
+        params: dict[str, Any],
+        key: tuple[int, int, int, int],
+        *,
+        replay: bool = False,
+    ) -> dict[str, Any]:
+        """Fetch a page with a conditional request, falling back to the cached payload if upstream fails."""
+        entry = await self.read(key)
+        if replay:
+            if entry is None:
+                raise CFCacheMissError(key)
+            return entry["payload"]
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            timeout = CF_CACHE_FALLBACK_TIMEOUT_SECONDS if entry else None
+            response = await asyncio.wait_for(cf_client.get(url, params=params, headers=headers), timeout)
+        except (HTTPError, TimeoutError):
+            if entry is None:
+                raise
+            log.warning("CF API unavailable for %s, using cached page from %s", key, entry.get("fetched_at"))
+            return entry["payload"]
+
+        if response.status_code == codes.NOT_MODIFIED and entry:
+            return entry["payload"]
+
+        payload = response.json()
+        await self.write(
+            key,
+            {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": dt.datetime.now(dt.UTC).isoformat(),
+                "payload": payload,
+            },
+        )
+        return payload
+
+
+cf_response_cache = CFResponseCache()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any
+
+from httpx import AsyncClient, HTTPError, HTTPStatusError, Limits, Response, codes
+
+from app.cf_games.constants import (
+    CF_API_MAX_CONCURRENT_REQUESTS,
+    CF_API_MAX_RETRIES,
+    CF_API_RATE_LIMIT_BURST,
+    CF_API_REQUEST_THROTTLE_SECONDS,
+    CF_API_RETRY_BACKOFF_SECONDS,
+    HTTPX_MAX_CONNECTIONS,
+    HTTPX_TIMEOUT,
+)
+
+log = logging.getLogger("uvicorn.error")
+
+
+class TokenBucket:
+    """Async token bucket. A rate of 0 disables limiting."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def is_transient_error(exc: HTTPError) -> bool:
+    if isinstance(exc, HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code == 429 or status_code >= 500  # noqa: PLR2004
+    return True
+
+
+class CFApiClient:
+    """Pooled, rate-limited httpx client for the CF leaderboard API, owned by the app lifespan."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        timeout: float = HTTPX_TIMEOUT,
+        max_connections: int = HTTPX_MAX_CONNECTIONS,
+        max_concurrent_requests: int = CF_API_MAX_CONCURRENT_REQUESTS,
+        throttle_seconds: float = CF_API_REQUEST_THROTTLE_SECONDS,
+        burst: int = CF_API_RATE_LIMIT_BURST,
+        max_retries: int = CF_API_MAX_RETRIES,
+        backoff_seconds: float = CF_API_RETRY_BACKOFF_SECONDS,
+    ) -> None:
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.limiter = TokenBucket(rate=1 / throttle_seconds if throttle_seconds > 0 else 0, capacity=burst)
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.client: AsyncClient | None = None
+
+    def open(self) -> AsyncClient:
+        if self.client is None or self.client.is_closed:
+            self.client = AsyncClient(
+                timeout=self.timeout,
+                limits=Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return self.client
+
+    async def close(self) -> None:
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    async def get(self, url: str, params: dict[str, Any], headers: dict[str, str] | None = None) -> Response:
+        client = self.open()
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    await self.limiter.acquire()
+                    response = await client.get(url=url, params=params, headers=headers)
+                    if response.status_code != codes.NOT_MODIFIED:
+                        response.raise_for_status()
+                    return response
+            except HTTPError as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_transient_error(e):
+                    raise
+                delay = self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)  # noqa: S311
+                log.warning("CF API error %r for %s, retry %s in %.2fs", e, params, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def get_json(self, url: str, params: dict[str, Any]) -> dict[str, Any]:
+        response = await self.get(url, params=params)
+        return response.json()
+
+
+cf_api_client = CFApiClient()
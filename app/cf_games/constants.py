@@ -77,5 +77,53 @@ CF_DIVISION_MAP = {
 
 
 # Throttle requests
-CF_API_REQUEST_THROTTLE_SECONDS = 0
+CF_API_REQUEST_THROTTLE_SECONDS = 0.1
+CF_API_RATE_LIMIT_BURST = 5
+CF_API_MAX_CONCURRENT_REQUESTS = 8
+CF_API_MAX_RETRIES = 3
+CF_API_RETRY_BACKOFF_SECONDS = 0.5
+CF_API_PAGE_SIZE = 100
 HTTPX_TIMEOUT = 20
+HTTPX_MAX_CONNECTIONS = 10
+
+# On-disk CF API response cache
+CF_CACHE_DIRECTORY = "cache/cf_api"
+CF_CACHE_FALLBACK_TIMEOUT_SECONDS = 10
+
+# Bulk ingestion
+BULK_UPSERT_CHUNK_SIZE = 500
+CF_STREAM_QUEUE_SIZE = 4
+
+# Scoring engine for refreshes: "sql" runs SCORING_PIPELINE, "numpy" needs the numpy extra
+SCORING_ENGINE = "sql"
+
+# (affiliate_id, year) leaderboards pulled by a default refresh
+CF_REFRESH_TARGETS = [
+    (AFFILIATE_ID, YEAR),
+]
+
+# Background refresh. 0 turns the auto refresh schedule off.
+AUTO_REFRESH_INTERVAL_MINUTES = 0
+
+# Rendered public pages kept in memory, across routes, params and request kinds
+FRAGMENT_CACHE_MAX_ENTRIES = 256
+
+# Seconds the nginx proxy may serve a public page without asking the app
+PAGE_PROXY_CACHE_SECONDS = 5
+
+# Publish mode: write every public page to STATIC_SITE_DIRECTORY whenever public data changes, for nginx to serve.
+# Clear the directory when turning it off, nginx serves whatever pages are there.
+PUBLISH_STATIC_SITE = False
+STATIC_SITE_DIRECTORY = "site"
+
+# Seconds between comments on an idle live score stream, so proxies keep it open
+LIVE_SCORES_KEEPALIVE_SECONDS = 15
+
+# Athlete score rows per page, the rest load as the table scrolls
+ATHLETE_SCORES_PAGE_SIZE = 50
+
+# Rows fetched from the export cursor and encoded per streamed chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Athletes listed by the admin name searches, best matches first
+ATHLETE_SEARCH_LIMIT = 25
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+
+from app.cf_games.constants import CF_REFRESH_TARGETS, SCORING_ENGINE
+from app.cf_games.schemas import RefreshStatusModel, RefreshTargetModel, ScoringEngine
+from app.cf_games.service import StageTimer, process_cf_targets
+from app.database.engine import session_manager
+
+log = logging.getLogger("uvicorn.error")
+
+
+class RefreshJobRunner:
+    """Runs the CF refresh pipeline in the background, one run at a time."""
+
+    def __init__(self) -> None:
+        self.status = RefreshStatusModel()
+        self._task: asyncio.Task | None = None
+        self._schedule_task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(  # noqa: PLR0913
+        self,
+        targets: list[tuple[int, int]] | None = None,
+        *,
+        bulk: bool = True,
+        delta: bool = False,
+        stream: bool = True,
+        replay: bool = False,
+        engine: ScoringEngine = SCORING_ENGINE,
+    ) -> asyncio.Task:
+        """Start a refresh, or return the one already in flight."""
+        if self._task is not None and not self._task.done():
+            log.info("Refresh already running, joining existing run")
+            return self._task
+
+        if targets is None:
+            targets = CF_REFRESH_TARGETS
+        self.status = RefreshStatusModel(
+            state="running",
+            started_at=dt.datetime.now(dt.UTC),
+            targets=[RefreshTargetModel(affiliate_id=x, year=y) for x, y in dict.fromkeys(targets)],
+            auto_refresh_minutes=self.status.auto_refresh_minutes,
+        )
+        self._task = asyncio.create_task(
+            self._run(bulk=bulk, delta=delta, stream=stream, replay=replay, engine=engine),
+        )
+        return self._task
+
+    async def _run(  # noqa: PLR0913
+        self,
+        *,
+        bulk: bool,
+        delta: bool,
+        stream: bool,
+        replay: bool,
+        engine: ScoringEngine,
+    ) -> None:
+        status = self.status
+        try:
+            async with session_manager.session() as db_session:
+                await process_cf_targets(
+                    db_session=db_session,
+                    targets=status.targets,
+                    bulk=bulk,
+                    delta=delta,
+                    stream=stream,
+                    replay=replay,
+                    engine=engine,
+                    stages=StageTimer(status.stages),
+                )
+            status.state = "done"
+        except Exception as e:  # noqa: BLE001
+            log.exception("Refresh failed")
+            status.state = "failed"
+            status.error = repr(e)
+        finally:
+            status.finished_at = dt.datetime.now(dt.UTC)
+
+    def schedule(self, interval_minutes: int) -> None:
+        """(Re)start periodic delta refreshes. An interval of 0 turns auto refresh off."""
+        if self._schedule_task:
+            self._schedule_task.cancel()
+            self._schedule_task = None
+        self.status.auto_refresh_minutes = interval_minutes
+        if interval_minutes > 0:
+            self._schedule_task = asyncio.create_task(self._auto_refresh(interval_minutes))
+
+    async def _auto_refresh(self, interval_minutes: int) -> None:
+        while True:
+            await asyncio.sleep(interval_minutes * 60)
+            log.info("Auto refresh")
+            await asyncio.wait([self.start(delta=True)])
+
+    async def stop(self) -> None:
+        self.schedule(0)
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.wait([self._task])
+
+
+refresh_job_runner = RefreshJobRunner()
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.base import Base
+
+
+class QuarantineRow(Base):
+    __table_args__ = (Index("ix_quarantine_row_year_affiliate_id", "year", "affiliate_id"),)
+
+    year: Mapped[int] = mapped_column(Integer)
+    affiliate_id: Mapped[int] = mapped_column(Integer)
+    kind: Mapped[str] = mapped_column(String)
+    payload: Mapped[str] = mapped_column(Text)
+    error: Mapped[str] = mapped_column(Text)
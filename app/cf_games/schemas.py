@@ -1,17 +1,139 @@
 from __future__ import annotations
 
-from typing import Self
+import datetime as dt
+from typing import Literal, Self
 
 from pydantic import Field, field_validator, model_validator
 
+from app.cf_games.constants import (
+    ATTENDANCE_SCORE,
+    DEFAULT_APPRECIATION_SCORE,
+    JUDGE_SCORE,
+    PARTICIPATION_SCORE,
+    TOP3_SCORE,
+)
 from app.schemas import CustomBaseModel
 
 
+ScoringEngine = Literal["sql", "numpy"]
+
+
+class CFIngestCountModel(CustomBaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
 class CFDataCountModel(CustomBaseModel):
     year: int
     affiliate_id: int
     entrant_count: int
     score_count: int
+    athlete_counts: CFIngestCountModel | None = None
+    score_counts: CFIngestCountModel | None = None
+    quarantined_count: int = 0
+    # Ordinals with scores written or deleted, None when not tracked
+    changed_ordinals: list[int] | None = None
+
+
+class RefreshTargetModel(CustomBaseModel):
+    affiliate_id: int
+    year: int
+    state: str = "pending"
+    page_count: int = 0
+    error: str | None = None
+    result: CFDataCountModel | None = None
+
+
+class RefreshStageModel(CustomBaseModel):
+    name: str
+    seconds: float | None = None
+
+
+class RefreshStatusModel(CustomBaseModel):
+    state: str = "idle"
+    started_at: dt.datetime | None = None
+    finished_at: dt.datetime | None = None
+    stages: list[RefreshStageModel] = []
+    error: str | None = None
+    targets: list[RefreshTargetModel] = []
+    auto_refresh_minutes: int = 0
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    @property
+    def current_stage(self) -> str | None:
+        if self.running and self.stages:
+            return self.stages[-1].name
+        return None
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall clock time of the run. Recorded busy times of pipelined stages overlap the ingest stage they ran in."""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def failed_targets(self) -> list[RefreshTargetModel]:
+        return [x for x in self.targets if x.state == "failed"]
+
+    @property
+    def quarantined_count(self) -> int:
+        return sum(x.result.quarantined_count for x in self.targets if x.result)
+
+
+class ScoringWeightsModel(CustomBaseModel):
+    participation: int = PARTICIPATION_SCORE
+    top3: int = TOP3_SCORE
+    judge: int = JUDGE_SCORE
+    attendance: int = ATTENDANCE_SCORE
+    appreciation: int = DEFAULT_APPRECIATION_SCORE
+
+
+class TeamScoreCountsModel(CustomBaseModel):
+    """How often a team earned each weighted score component. Scoring is linear in the weights."""
+
+    team_name: str
+    participation_count: int = 0
+    top3_count: int = 0
+    attendance_count: int = 0
+    judge_count: int = 0
+    # Appreciation awarded at the default score follows the weight, custom amounts are kept as given
+    appreciation_count: int = 0
+    appreciation_custom_score: int = 0
+    side_score: int = 0
+
+    def total_score(self, weights: ScoringWeightsModel) -> int:
+        return (
+            self.participation_count * weights.participation
+            + self.top3_count * weights.top3
+            + self.attendance_count * weights.attendance
+            + self.judge_count * weights.judge
+            + self.appreciation_count * weights.appreciation
+            + self.appreciation_custom_score
+            + self.side_score
+        )
+
+
+class ScoreSnapshotModel(CustomBaseModel):
+    loaded_at: dt.datetime
+    teams: list[TeamScoreCountsModel] = []
+
+
+class TeamStandingModel(CustomBaseModel):
+    team_name: str
+    current_score: int
+    current_rank: int
+    simulated_score: int
+    simulated_rank: int
+
+    @property
+    def rank_change(self) -> int:
+        return self.current_rank - self.simulated_rank
 
 
 class CFEntrantInputModel(CustomBaseModel):
@@ -0,0 +1,318 @@
+"""
+NumPy scoring engine.
+
+Loads a score table into column arrays, computes affiliate ranks and every score component in vectorized passes and
+writes them back with one bulk UPDATE. It produces the same scores as the SQL SCORING_PIPELINE.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+from sqlalchemy import (
+    Column,
+    ColumnElement,
+    Integer,
+    MetaData,
+    Select,
+    String,
+    Table,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    type_coerce,
+    update,
+)
+
+from app.appreciation.models import Appreciation
+from app.athlete.models import Athlete
+from app.attendance.models import Attendance
+from app.cf_games.constants import AFFILIATE_ID, ATTENDANCE_SCORE, IGNORE_TEAMS, JUDGE_SCORE, TOP3_SCORE, YEAR
+from app.database.base import Base
+from app.score.models import Score, ScoreTable, SideScore
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.cf_games.service import StageTimer
+
+log = logging.getLogger("uvicorn.error")
+
+UNRANKED = 999
+
+
+def factorize(*columns: np.ndarray) -> np.ndarray:
+    """Dense integer codes for the distinct value tuples across columns."""
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for values in columns:
+        uniques, inverse = np.unique(values, return_inverse=True)
+        codes = np.unique(codes * len(uniques) + inverse, return_inverse=True)[1]
+    return codes
+
+
+def match_codes(left: list[np.ndarray], right: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Codes for two tables' key columns, equal where the keys are equal."""
+    codes = factorize(*(np.concatenate([x, y]) for x, y in zip(left, right, strict=True)))
+    return codes[: len(left[0])], codes[len(left[0]) :]
+
+
+def lookup(keys: np.ndarray, table_keys: np.ndarray, table_values: np.ndarray, default: int = 0) -> np.ndarray:
+    """Vectorized dict lookup of keys in (table_keys -> table_values)."""
+    if not len(table_keys):
+        return np.full(len(keys), default, dtype=np.int64)
+    order = np.argsort(table_keys)
+    sorted_keys = table_keys[order]
+    index = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return np.where(sorted_keys[index] == keys, table_values[order][index], default)
+
+
+def affiliate_ranks(group: np.ndarray, scaled: np.ndarray, score: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+    """rank() OVER (PARTITION BY group ORDER BY scaled, score DESC) for eligible rows, UNRANKED for the rest."""
+    ranks = np.full(len(group), UNRANKED, dtype=np.int64)
+    index = np.flatnonzero(eligible)
+    if not len(index):
+        return ranks
+    order = index[np.lexsort((-score[index], scaled[index], group[index]))]
+    group, scaled, score = group[order], scaled[order], score[order]
+    position = np.arange(len(order))
+    new_group = np.r_[True, group[1:] != group[:-1]]
+    new_value = new_group | np.r_[True, (scaled[1:] != scaled[:-1]) | (score[1:] != score[:-1])]
+    group_start = np.maximum.accumulate(np.where(new_group, position, 0))
+    value_start = np.maximum.accumulate(np.where(new_value, position, 0))
+    ranks[order] = value_start - group_start + 1
+    return ranks
+
+
+def first_in_group(group: np.ndarray, *sort_keys: np.ndarray) -> np.ndarray:
+    """True for the first row of each group when ordered by sort_keys, i.e. row_number() = 1."""
+    order = np.lexsort((*reversed(sort_keys), group))
+    first = np.zeros(len(group), dtype=bool)
+    first[order] = np.r_[True, group[order][1:] != group[order][:-1]] if len(order) else []
+    return first
+
+
+def rowid(model: type[Base]) -> ColumnElement[int]:
+    """SQLite's implicit integer row key, much cheaper to load and match on than the uuid id."""
+    return column("rowid", Integer, _selectable=model.__table__)
+
+
+SCORE_COMPONENTS = [
+    "affiliate_rank",
+    "top3_score",
+    "attendance_score",
+    "judge_score",
+    "appreciation_score",
+    "side_challenge_score",
+    "spirit_score",
+    "total_score",
+]
+
+
+async def load_arrays(db_session: AsyncSession, stmt: Select) -> dict[str, np.ndarray]:
+    """Run stmt and return one array per column. Text columns holding NULLs stay object arrays."""
+    # Core execution on the session's connection skips the ORM result layer, which dominates load time
+    connection = await db_session.connection()
+    result = await connection.execute(stmt)
+    keys = list(result.keys())
+    columns = list(zip(*result.all(), strict=True)) or [() for _ in keys]
+    arrays = {}
+    for selected, key, values in zip(stmt.selected_columns, keys, columns, strict=True):
+        if isinstance(selected.type, Integer):
+            arrays[key] = np.array(values, dtype=np.int64)
+        elif None in values:
+            arrays[key] = np.array(values, dtype=object)
+        else:
+            arrays[key] = np.array(values, dtype=str)
+    return arrays
+
+
+async def load_score_arrays(
+    db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    ordinals: set[int] | None = None,
+) -> dict[str, np.ndarray]:
+    """Score columns plus their athlete's columns, loaded per athlete and broadcast, not repeated per score."""
+    stmt = select(
+        rowid(score_model).label("score_row"),
+        type_coerce(score_model.id, String).label("score_id"),
+        rowid(Athlete).label("athlete_row"),
+        score_model.ordinal,
+        func.coalesce(score_model.event_name, "").label("event_name"),
+        score_model.scaled,
+        score_model.score,
+        score_model.affiliate_scaled,
+        score_model.participation_score,
+        score_model.judge_key,
+        *(getattr(score_model, x) for x in SCORE_COMPONENTS),
+    ).join_from(score_model, Athlete, score_model.athlete_id == Athlete.id)
+    if ordinals is not None:
+        stmt = stmt.where(score_model.ordinal.in_(ordinals))
+    scores = await load_arrays(db_session, stmt)
+
+    stmt = select(
+        rowid(Athlete).label("athlete_row"),
+        Athlete.year,
+        Athlete.affiliate_id,
+        Athlete.gender,
+        Athlete.mf_age_category,
+        Athlete.team_name,
+        Athlete.team_leader,
+        Athlete.name,
+        Athlete.name_key,
+    ).order_by(rowid(Athlete))
+    athletes = await load_arrays(db_session, stmt)
+    athlete_index = np.searchsorted(athletes.pop("athlete_row"), scores["athlete_row"])
+    return scores | {key: values[athlete_index] for key, values in athletes.items()}
+
+
+async def load_attendance_arrays(db_session: AsyncSession) -> dict[str, np.ndarray]:
+    stmt = select(rowid(Athlete).label("athlete_row"), Attendance.ordinal).join_from(
+        Attendance,
+        Athlete,
+        Attendance.athlete_id == Athlete.id,
+    )
+    return await load_arrays(db_session, stmt)
+
+
+async def load_appreciation_arrays(db_session: AsyncSession) -> dict[str, np.ndarray]:
+    stmt = select(rowid(Athlete).label("athlete_row"), Appreciation.ordinal, Appreciation.score).join_from(
+        Appreciation,
+        Athlete,
+        Appreciation.athlete_id == Athlete.id,
+    )
+    return await load_arrays(db_session, stmt)
+
+
+async def load_latest_side_scores(db_session: AsyncSession) -> dict[str, dict[tuple[str, str], int]]:
+    """Latest side score per score type and (event_name, team_name)."""
+    stmt = select(SideScore.score_type, SideScore.event_name, SideScore.team_name, SideScore.score).order_by(
+        SideScore.created_at,
+    )
+    latest: dict[str, dict[tuple[str, str], int]] = {"side_challenge": {}, "spirit": {}}
+    for score_type, event_name, team_name, score in await db_session.execute(stmt):
+        latest.setdefault(score_type, {})[(event_name, team_name)] = score
+    return latest
+
+
+def side_score_lookup(scores: dict[str, np.ndarray], latest: dict[tuple[str, str], int]) -> np.ndarray:
+    events = np.array([x[0] for x in latest], dtype=str)
+    teams = np.array([x[1] for x in latest], dtype=str)
+    codes, table_codes = match_codes([scores["event_name"], scores["team_name"]], [events, teams])
+    return lookup(codes, table_codes, np.array(list(latest.values()), dtype=np.int64))
+
+
+# Scratch table the new components are bulk inserted into, then applied with one UPDATE ... FROM
+score_update = Table(
+    "score_update",
+    MetaData(),
+    Column("score_row", Integer, primary_key=True),
+    *(Column(x, Integer) for x in SCORE_COMPONENTS),
+    prefixes=["TEMPORARY"],
+)
+
+
+async def write_score_components(
+    db_session: AsyncSession,
+    score_model: ScoreTable,
+    rows: list[tuple[int, ...]],
+) -> None:
+    """Apply (score_row, *SCORE_COMPONENTS) tuples to score_model."""
+    connection = await db_session.connection()
+    await connection.run_sync(score_update.create, checkfirst=True)
+    # Positional executemany of the compiled INSERT, skipping per-row dict parameter processing
+    insert_sql = str(insert(score_update).compile(dialect=connection.dialect))
+    await connection.exec_driver_sql(insert_sql, rows)
+    update_stmt = (
+        update(score_model.__table__)
+        .where(rowid(score_model) == score_update.c.score_row)
+        .values({x: score_update.c[x] for x in SCORE_COMPONENTS})
+    )
+    await connection.execute(update_stmt)
+    await connection.execute(delete(score_update))
+
+
+async def apply_vectorized_scoring(
+    db_session: AsyncSession,
+    score_model: ScoreTable,
+    stages: StageTimer,
+    ordinals: set[int] | None = None,
+) -> None:
+    """Score every row of score_model, or of the given ordinals, in NumPy and write the changes back. Callers commit."""
+    with stages.stage("load"):
+        scores = await load_score_arrays(db_session=db_session, score_model=score_model, ordinals=ordinals)
+        attendance = await load_attendance_arrays(db_session=db_session)
+        appreciation = await load_appreciation_arrays(db_session=db_session)
+        side_scores = await load_latest_side_scores(db_session=db_session)
+
+    with stages.stage("compute"):
+        ranked = ~np.isin(scores["team_name"], IGNORE_TEAMS) & (scores["score"] > 0)
+        group = factorize(
+            scores["year"],
+            scores["affiliate_id"],
+            scores["ordinal"],
+            scores["gender"],
+            scores["mf_age_category"],
+            scores["affiliate_scaled"],
+        )
+        affiliate_rank = affiliate_ranks(group, scores["scaled"], scores["score"], ranked)
+        top3_score = np.where(affiliate_rank <= 3, TOP3_SCORE, 0)  # noqa: PLR2004
+
+        athlete_event = [scores["athlete_row"], scores["ordinal"]]
+        codes, attended = match_codes(athlete_event, [attendance["athlete_row"], attendance["ordinal"]])
+        attendance_score = np.where(np.isin(codes, attended), ATTENDANCE_SCORE, 0)
+        codes, appreciated = match_codes(athlete_event, [appreciation["athlete_row"], appreciation["ordinal"]])
+        appreciation_score = lookup(codes, appreciated, appreciation["score"])
+
+        # An athlete judged an event if their name key matches any judge key of that event, same year and affiliate
+        has_name, has_judge = scores["name_key"] != None, scores["judge_key"] != None  # noqa: E711
+        event_keys = [scores["year"], scores["affiliate_id"], scores["ordinal"]]
+        names, judges = match_codes(
+            [*(x[has_name] for x in event_keys), scores["name_key"][has_name].astype(str)],
+            [*(x[has_judge] for x in event_keys), scores["judge_key"][has_judge].astype(str)],
+        )
+        judge_score = np.zeros(len(group), dtype=np.int64)
+        judge_score[has_name] = np.where(np.isin(names, judges), JUDGE_SCORE, 0)
+
+        # Side scores land on one score per team and event, the team leader's first, of the configured target only
+        team_first = first_in_group(
+            factorize(scores["year"], scores["affiliate_id"], scores["event_name"], scores["team_name"]),
+            -scores["team_leader"],
+            scores["name"],
+            scores["score_id"],
+        ) & (scores["year"] == YEAR) & (scores["affiliate_id"] == AFFILIATE_ID)
+        side_challenge_score = np.where(team_first, side_score_lookup(scores, side_scores["side_challenge"]), 0)
+        spirit_score = np.where(team_first, side_score_lookup(scores, side_scores["spirit"]), 0)
+
+        total_score = (
+            scores["participation_score"]
+            + top3_score
+            + attendance_score
+            + judge_score
+            + appreciation_score
+            + side_challenge_score
+            + spirit_score
+        )
+        components = [
+            affiliate_rank,
+            top3_score,
+            attendance_score,
+            judge_score,
+            appreciation_score,
+            side_challenge_score,
+            spirit_score,
+            total_score,
+        ]
+        # Most rows score the same as last refresh, only write the ones that changed
+        changed = np.zeros(len(group), dtype=bool)
+        for name, values in zip(SCORE_COMPONENTS, components, strict=True):
+            changed |= scores[name] != values
+
+    with stages.stage("write"):
+        rows = list(zip(scores["score_row"][changed].tolist(), *(x[changed].tolist() for x in components), strict=True))
+        if rows:
+            await write_score_components(db_session=db_session, score_model=score_model, rows=rows)
+    log.info("Scored %s rows with the numpy engine, %s changed", len(group), len(rows))
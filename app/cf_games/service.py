@@ -1,281 +1,1232 @@
 from __future__ import annotations
 
 import asyncio
+import datetime as dt
+import hashlib
+import json
 import logging
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from itertools import batched
+from typing import Any, Self
+from uuid import UUID, uuid4
 
-from httpx import AsyncClient, HTTPError
-from pydantic import ValidationError
-from sqlalchemy import func, select, update
+from httpx import HTTPError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import ColumnElement, Select, Subquery, case, delete, func, insert, select, update
+from sqlalchemy.dialects.sqlite import Insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.appreciation.models import Appreciation
-from app.athlete.models import Athlete
+from app.athlete.models import Athlete, is_public_target
 from app.athlete_prefs.service import random_assign_athlete_prefs
 from app.attendance.models import Attendance
+from app.cf_games.cache import CFCacheMissError, cf_response_cache
+from app.cf_games.client import CFApiClient, cf_api_client
 from app.cf_games.constants import (
     AFFILIATE_ID,
     ATTENDANCE_SCORE,
+    BULK_UPSERT_CHUNK_SIZE,
+    CF_API_PAGE_SIZE,
     CF_DIVISION_MAP,
     CF_LEADERBOARD_URL,
-    HTTPX_TIMEOUT,
+    CF_STREAM_QUEUE_SIZE,
     IGNORE_TEAMS,
     JUDGE_SCORE,
     PARTICIPATION_SCORE,
+    SCORING_ENGINE,
     TOP3_SCORE,
     YEAR,
 )
-from app.cf_games.schemas import CFDataCountModel, CFEntrantInputModel, CFScoreInputModel
-from app.score.models import Score, SideScore
+from app.cf_games.models import QuarantineRow
+from app.cf_games.schemas import (
+    CFDataCountModel,
+    CFEntrantInputModel,
+    CFIngestCountModel,
+    CFScoreInputModel,
+    RefreshStageModel,
+    RefreshTargetModel,
+    ScoringEngine,
+)
+from app.database.base import Base
+from app.score.models import Score, ScoreStaging, ScoreTable, SideScore
+from app.score.service import rebuild_score_read_models, record_score_history
 
 log = logging.getLogger("uvicorn.error")
 
 
+def cf_page_params(affiliate_code: int, division: int, page: int) -> dict[str, int]:
+    return {"affiliate": affiliate_code, "page": page, "per_page": CF_API_PAGE_SIZE, "view": 0, "division": division}
+
+
 async def cf_data_api(  # noqa: PLR0913
-    httpx_client: AsyncClient,
+    cf_client: CFApiClient,
     api_url: str,
+    year: int,
     affiliate_code: int,
     division: int,
-    entrant_list: list[dict],
-    scores_list: list[dict],
+    on_page: Callable[[list[dict]], Awaitable[None]],
+    *,
+    replay: bool = False,
 ) -> None:
-    total_pages = 1
-    page = 1
-    while True:
-        params = {"affiliate": affiliate_code, "page": page, "per_page": 100, "view": 0, "division": division}
-        response = await httpx_client.get(url=api_url, params=params)
+    async def get_page(page: int) -> dict:
+        json_response = await cf_response_cache.fetch(
+            cf_client,
+            api_url,
+            params=cf_page_params(affiliate_code, division, page),
+            key=(year, affiliate_code, division, page),
+            replay=replay,
+        )
+        await on_page(json_response.get("leaderboardRows", []))
+        return json_response
 
-        json_response = response.json()
-        leaderboard_list = json_response.get("leaderboardRows", [])
-        entrants = [x.get("entrant") for x in leaderboard_list]
-        entrant_list.extend(entrants)
-        scores = [x.get("scores") for x in leaderboard_list]
-        scores_list.extend(scores)
+    first_page = await get_page(1)
+    total_pages = first_page.get("pagination", {}).get("totalPages", 1)
+    await asyncio.gather(*[get_page(page) for page in range(2, total_pages + 1)])
 
-        # Handle pagination
-        total_pages = json_response.get("pagination", {}).get("totalPages", 1)
-        if total_pages <= page:
-            break
 
-        page += 1
+async def fetch_cf_pages(
+    affiliate_code: int,
+    year: int,
+    on_page: Callable[[list[dict]], Awaitable[None]],
+    cf_client: CFApiClient = cf_api_client,
+    *,
+    replay: bool = False,
+) -> None:
+    """Fetch every division's leaderboard pages, handing each page's rows to on_page."""
+    log.info("Getting CF Leaderboard data for year %s affiliate code %s", year, affiliate_code)
+    api_url = CF_LEADERBOARD_URL.replace("YYYY", str(year))
+
+    try:
+        await asyncio.gather(
+            *[
+                cf_data_api(
+                    cf_client=cf_client,
+                    api_url=api_url,
+                    year=year,
+                    affiliate_code=affiliate_code,
+                    division=int(x),
+                    on_page=on_page,
+                    replay=replay,
+                )
+                for x in CF_DIVISION_MAP
+            ],
+        )
+    except HTTPError:
+        log.exception("HTTP Exception while getting CF data")
+        raise
+    except CFCacheMissError:
+        log.exception("CF response cache miss while replaying")
+        raise
 
 
-async def get_cf_data(affiliate_code: int, year: int) -> tuple[int, list[dict], list[dict]]:
-    """Get CF leaderboard data."""
-    log.info("Getting CF Leaderboard data for year %s affiliate code %s", year, affiliate_code)
+async def get_cf_data(
+    affiliate_code: int,
+    year: int,
+    cf_client: CFApiClient = cf_api_client,
+    *,
+    replay: bool = False,
+) -> tuple[int, list[dict], list[dict]]:
+    """Get CF leaderboard data. With replay=True, read only from the on-disk response cache."""
     entrant_list = []
     scores_list = []
 
-    api_url = CF_LEADERBOARD_URL.replace("YYYY", str(year))
-
-    try:
-        async with AsyncClient(timeout=HTTPX_TIMEOUT) as aclient:
-            await asyncio.gather(
-                *[
-                    cf_data_api(
-                        httpx_client=aclient,
-                        api_url=api_url,
-                        affiliate_code=affiliate_code,
-                        division=int(x),
-                        entrant_list=entrant_list,
-                        scores_list=scores_list,
-                    )
-                    for x in CF_DIVISION_MAP
-                ],
-            )
+    async def on_page(leaderboard_list: list[dict]) -> None:
+        entrant_list.extend([x.get("entrant") for x in leaderboard_list])
+        scores_list.extend([x.get("scores") for x in leaderboard_list])
 
-    except HTTPError:
-        log.warning("HTTP Exception while getting CF data")
+    await fetch_cf_pages(affiliate_code, year, on_page, cf_client, replay=replay)
 
     log.info("Downloaded %s entrants, %s scores", len(entrant_list), len(scores_list))
     return year, entrant_list, scores_list
 
 
-async def process_cf_data(
+class StageTimer:
+    """Records how long each named stage of a refresh takes."""
+
+    def __init__(self, stages: list[RefreshStageModel] | None = None) -> None:
+        self.stages = stages if stages is not None else []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[RefreshStageModel]:
+        stage = RefreshStageModel(name=name)
+        self.stages.append(stage)
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            log.info("Refresh stage %s took %.3fs", name, stage.seconds)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a stage measured elsewhere, e.g. busy time of an overlapping pipeline stage."""
+        self.stages.append(RefreshStageModel(name=name, seconds=seconds))
+        log.info("Refresh stage %s took %.3fs", name, seconds)
+
+
+class CFRefreshError(Exception):
+    pass
+
+
+# Held by a refresh from staging to swap and by admin recomputes, so the two never write scores at the same time
+score_write_lock = asyncio.Lock()
+
+
+class ScoredAthletes:
+    """
+    Latest athlete change the live scores were scored with, unknown until this process scores once.
+
+    Every scoring step ranks and matches within one ordinal, athlete columns are the only input shared across them.
+    While no athlete changed since the last scoring, a delta refresh only rescores the ordinals whose scores it wrote
+    or deleted. Otherwise, e.g. after a team edit, it rescores all of them.
+    """
+
+    def __init__(self) -> None:
+        self.updated_at: dt.datetime | None = None
+
+    @staticmethod
+    async def current(db_session: AsyncSession) -> dt.datetime | None:
+        return await db_session.scalar(select(func.max(Athlete.updated_at)))
+
+    def rescore_ordinals(
+        self,
+        targets: list[RefreshTargetModel],
+        athletes_updated_at: dt.datetime | None,
+    ) -> set[int] | None:
+        """Ordinals the refreshed targets changed, or None to rescore all."""
+        if self.updated_at is None or athletes_updated_at != self.updated_at:
+            return None
+        ordinals = set()
+        for target in targets:
+            if target.state == "done":
+                if target.result is None or target.result.changed_ordinals is None:
+                    return None
+                ordinals.update(target.result.changed_ordinals)
+        return ordinals
+
+
+scored_athletes = ScoredAthletes()
+
+
+async def process_cf_data(  # noqa: PLR0913
     db_session: AsyncSession,
     affiliate_id: int = AFFILIATE_ID,
     year: int = YEAR,
+    *,
+    bulk: bool = True,
+    delta: bool = False,
+    stream: bool = True,
+    replay: bool = False,
+    engine: ScoringEngine = SCORING_ENGINE,
+    stages: StageTimer | None = None,
 ) -> CFDataCountModel:
-    year, entrant_list, scores_list = await get_cf_data(affiliate_id, year)
+    target = RefreshTargetModel(affiliate_id=affiliate_id, year=year)
+    await process_cf_targets(
+        db_session=db_session,
+        targets=[target],
+        bulk=bulk,
+        delta=delta,
+        stream=stream,
+        replay=replay,
+        engine=engine,
+        stages=stages,
+    )
+    return target.result
+
+
+async def process_cf_targets(  # noqa: PLR0913
+    db_session: AsyncSession,
+    targets: list[RefreshTargetModel],
+    *,
+    bulk: bool = True,
+    delta: bool = False,
+    stream: bool = True,
+    replay: bool = False,
+    engine: ScoringEngine = SCORING_ENGINE,
+    stages: StageTimer | None = None,
+) -> None:
+    """
+    Refresh several (affiliate, year) leaderboards into the staging table and score them together.
+
+    Targets download concurrently over the shared CF client. A target whose download fails is marked failed and
+    keeps its previous scores; the refresh only fails if every target does.
+    """
+    if stages is None:
+        stages = StageTimer()
+
+    async with score_write_lock:
+        await prepare_score_staging(db_session=db_session)
+        if not (bulk or delta):
+            await ingest_cf_targets_rowwise(
+                db_session=db_session,
+                targets=targets,
+                score_model=ScoreStaging,
+                replay=replay,
+                stages=stages,
+            )
+        else:
+            ingest_targets = stream_cf_targets if stream else ingest_cf_targets_bulk
+            await ingest_targets(
+                db_session=db_session,
+                targets=targets,
+                score_model=ScoreStaging,
+                delta=delta,
+                replay=replay,
+                stages=stages,
+            )
+
+        if all(x.state == "failed" for x in targets):
+            raise CFRefreshError("; ".join(f"{x.affiliate_id}/{x.year}: {x.error}" for x in targets))
+
+        athletes_updated_at = await scored_athletes.current(db_session=db_session)
+        ordinals = None
+        if delta:
+            ordinals = scored_athletes.rescore_ordinals(
+                targets=targets,
+                athletes_updated_at=athletes_updated_at,
+            )
+        await apply_scoring_pipeline(
+            db_session=db_session,
+            score_model=ScoreStaging,
+            engine=engine,
+            stages=stages,
+            ordinals=ordinals,
+        )
+        with stages.stage("swap"):
+            if ordinals == set():
+                # Nothing staged changed, so the read models, the data generation and the pages' ETags stay as they are
+                await db_session.execute(delete(ScoreStaging))
+                await db_session.commit()
+            else:
+                await swap_score_staging(db_session=db_session)
+        scored_athletes.updated_at = athletes_updated_at
+    with stages.stage(random_assign_athlete_prefs.__name__):
+        await random_assign_athlete_prefs(db_session=db_session)
+
+
+async def guard_cf_target(target: RefreshTargetModel, coro: Awaitable[None]) -> None:
+    """Run one target's download, recording CF API failures on the target instead of raising."""
+    target.state = "running"
+    try:
+        await coro
+    except* (HTTPError, CFCacheMissError) as eg:
+        target.state = "failed"
+        target.error = repr(eg.exceptions[0])
+
+
+async def download_cf_targets(
+    targets: list[RefreshTargetModel],
+    *,
+    replay: bool = False,
+) -> dict[int, tuple[list[dict], list[dict]]]:
+    """Download every target concurrently. Returns entrant and score lists keyed by target index."""
+    downloads = {}
 
-    await Score.delete_all(async_session=db_session)
+    async def download(i: int, target: RefreshTargetModel) -> None:
+        _, entrant_list, scores_list = await get_cf_data(target.affiliate_id, target.year, replay=replay)
+        downloads[i] = (entrant_list, scores_list)
 
+    await asyncio.gather(*[guard_cf_target(x, download(i, x)) for i, x in enumerate(targets)])
+    return downloads
+
+
+async def ingest_cf_targets_rowwise(
+    db_session: AsyncSession,
+    targets: list[RefreshTargetModel],
+    score_model: ScoreTable = Score,
+    *,
+    replay: bool = False,
+    stages: StageTimer,
+) -> None:
+    """Rebuild each downloaded target's scores row by row. A target that fails validation keeps its live scores."""
+    with stages.stage("download"):
+        downloads = await download_cf_targets(targets, replay=replay)
+
+    with stages.stage("ingest"):
+        for i, (entrant_list, scores_list) in downloads.items():
+            target = targets[i]
+            await db_session.execute(
+                delete(score_model).where(score_model.athlete_id.in_(target_athlete_ids(target=target))),
+            )
+            try:
+                score_count = await ingest_cf_data_rowwise(
+                    db_session=db_session,
+                    year=target.year,
+                    entrant_list=entrant_list,
+                    scores_list=scores_list,
+                    score_model=score_model,
+                )
+            except ValidationError as e:
+                await db_session.rollback()
+                target.state = "failed"
+                target.error = repr(e)
+                if score_model is ScoreStaging:
+                    await restore_target_staging(db_session=db_session, target=target)
+                continue
+            target.result = CFDataCountModel(
+                year=target.year,
+                affiliate_id=target.affiliate_id,
+                entrant_count=len(entrant_list),
+                score_count=score_count,
+            )
+            target.state = "done"
+
+
+async def ingest_cf_targets_bulk(  # noqa: PLR0913
+    db_session: AsyncSession,
+    targets: list[RefreshTargetModel],
+    score_model: ScoreTable = Score,
+    *,
+    delta: bool = False,
+    replay: bool = False,
+    stages: StageTimer,
+) -> None:
+    with stages.stage("download"):
+        downloads = await download_cf_targets(targets, replay=replay)
+
+    for i, (entrant_list, scores_list) in downloads.items():
+        target = targets[i]
+        with stages.stage("validate"):
+            rows, quarantined = validate_cf_page(entrant_list, scores_list)
+        with stages.stage("upsert"):
+            batch = await ingest_cf_data_bulk(
+                db_session=db_session,
+                year=target.year,
+                affiliate_id=target.affiliate_id,
+                rows=rows,
+                quarantined=quarantined,
+                score_model=score_model,
+                delta=delta,
+            )
+        target.result = batch.count_model()
+        target.state = "done"
+
+
+async def ingest_cf_data_rowwise(
+    db_session: AsyncSession,
+    year: int,
+    entrant_list: list[dict],
+    scores_list: list[dict],
+    score_model: ScoreTable = Score,
+) -> int:
+    """Upsert entrants and their scores one by one. Returns the number of score rows written."""
+    score_count = 0
     for entrant, scores in zip(entrant_list, scores_list, strict=True):
         try:
             entrant_model = CFEntrantInputModel.model_validate(entrant)
         except ValidationError:
             log.exception("Error validating Entrant %s", entrant)
             raise
-        athlete = await Athlete.find(async_session=db_session, competitor_id=entrant_model.competitor_id)
+        athlete = await Athlete.find(async_session=db_session, competitor_id=entrant_model.competitor_id, year=year)
         if athlete is None:
-            athlete = Athlete(**entrant_model.model_dump(), year=year)
+            # Set up front, the score rows reference it before the flush
+            athlete = Athlete(**entrant_model.model_dump(), year=year, id=uuid4())
             db_session.add(athlete)
 
         if scores:
             for score in scores:
                 try:
-                    score_model = CFScoreInputModel.model_validate(score)
+                    score_input = CFScoreInputModel.model_validate(score)
                 except ValidationError:
                     log.exception("Error validating Entrant %s score %s", entrant, score)
                     raise
-                event_score = await Score.find(
+                event_score = await score_model.find(
                     async_session=db_session,
                     athlete_id=athlete.id,
-                    ordinal=score_model.ordinal,
+                    ordinal=score_input.ordinal,
                 )
                 if event_score:
-                    for var, value in vars(score_model).items():
+                    for var, value in vars(score_input).items():
                         setattr(event_score, var, value) if value else None
                 else:
-                    event_score = Score(
-                        **score_model.model_dump(),
-                        athlete=athlete,
+                    event_score = score_model(
+                        **score_input.model_dump(),
+                        athlete_id=athlete.id,
                     )
                 if event_score.score > 0:
                     event_score.participation_score = PARTICIPATION_SCORE
                 db_session.add(event_score)
+                score_count += 1
 
     await db_session.commit()
+    return score_count
+
+
+CF_ENTRANT_LIST_ADAPTER = TypeAdapter(list[CFEntrantInputModel])
+CF_SCORE_LIST_ADAPTER = TypeAdapter(list[CFScoreInputModel])
+
+CFValidatedRow = tuple[dict, list[dict], CFEntrantInputModel, list[CFScoreInputModel]]
+
+
+def validate_batch(adapter: TypeAdapter, items: list[dict]) -> tuple[dict[int, Any], dict[int, str]]:
+    """Validate a list in one pydantic-core call. Returns models and errors, both keyed by list index."""
+    try:
+        return dict(enumerate(adapter.validate_python(items))), {}
+    except ValidationError as e:
+        errors: dict[int, list[dict]] = {}
+        for error in e.errors(include_url=False, include_input=False):
+            errors.setdefault(error["loc"][0], []).append({**error, "loc": error["loc"][1:]})
+    valid_index = [i for i in range(len(items)) if i not in errors]
+    models = adapter.validate_python([items[i] for i in valid_index])
+    return dict(zip(valid_index, models, strict=True)), {k: json.dumps(v, default=str) for k, v in errors.items()}
+
+
+def validate_cf_page(
+    entrant_list: list[dict],
+    scores_list: list[list[dict] | None],
+) -> tuple[list[CFValidatedRow], list[dict]]:
+    """
+    Batch validate a page of CF rows. Invalid entrants and scores are returned for quarantine, not raised, along with
+    the valid scores of invalid entrants.
+    """
+    entrant_models, entrant_errors = validate_batch(CF_ENTRANT_LIST_ADAPTER, entrant_list)
+    flat_scores = [(i, score) for i, scores in enumerate(scores_list) for score in scores or []]
+    score_models, score_errors = validate_batch(CF_SCORE_LIST_ADAPTER, [x[1] for x in flat_scores])
+
+    quarantined = [
+        {"kind": "entrant", "payload": entrant_list[i], "error": error} for i, error in entrant_errors.items()
+    ]
+    quarantined.extend(
+        {"kind": "score", "payload": flat_scores[i][1], "error": error} for i, error in score_errors.items()
+    )
+
+    valid_scores: dict[int, tuple[list[dict], list[CFScoreInputModel]]] = {}
+    for i, (entrant_index, score) in enumerate(flat_scores):
+        if i in score_models and entrant_index in entrant_errors:
+            # A valid score of an invalid entrant has no athlete to land on
+            quarantined.append({"kind": "score", "payload": score, "error": "entrant invalid"})
+        elif i in score_models:
+            raw, models = valid_scores.setdefault(entrant_index, ([], []))
+            raw.append(score)
+            models.append(score_models[i])
+
+    rows = []
+    for i, entrant in enumerate(entrant_list):
+        if i in entrant_models:
+            raw_scores, models = valid_scores.get(i, ([], []))
+            rows.append((entrant, raw_scores, entrant_models[i], models))
+    return rows, quarantined
+
+
+def payload_fingerprint(payload: dict) -> str:
+    """Content hash of a raw CF payload row, stable across key ordering."""
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+async def get_athlete_fingerprints(
+    db_session: AsyncSession,
+    year: int,
+) -> dict[tuple[int, int], tuple[UUID, str | None]]:
+    stmt = select(Athlete.competitor_id, Athlete.year, Athlete.id, Athlete.fingerprint).where(Athlete.year == year)
+    ret = await db_session.execute(stmt)
+    return {(row.competitor_id, row.year): (row.id, row.fingerprint) for row in ret}
+
+
+async def get_score_fingerprints(
+    db_session: AsyncSession,
+    year: int,
+    affiliate_id: int,
+    score_model: ScoreTable = Score,
+) -> dict[tuple[UUID, int], tuple[UUID, str | None]]:
+    stmt = (
+        select(score_model.athlete_id, score_model.ordinal, score_model.id, score_model.fingerprint)
+        .join_from(score_model, Athlete, score_model.athlete_id == Athlete.id)
+        .where((Athlete.year == year) & (Athlete.affiliate_id == affiliate_id))
+    )
+    ret = await db_session.execute(stmt)
+    return {(row.athlete_id, row.ordinal): (row.id, row.fingerprint) for row in ret}
+
+
+def classify_fingerprint(
+    counts: CFIngestCountModel,
+    existing: tuple[UUID, str | None] | None,
+    fingerprint: str,
+    *,
+    force: bool = False,
+) -> bool:
+    """Count the row as inserted, updated or unchanged. Returns True if it needs writing."""
+    if existing is None:
+        counts.inserted += 1
+        return True
+    if force or existing[1] != fingerprint:
+        counts.updated += 1
+        return True
+    counts.unchanged += 1
+    return False
+
+
+ATHLETE_UPSERT_COLUMNS = [
+    *CFEntrantInputModel.model_fields,
+    "mf_age_category",
+    "name_key",
+    "fingerprint",
+    "updated_at",
+]
+SCORE_UPSERT_COLUMNS = [
+    *CFScoreInputModel.model_fields,
+    "participation_score",
+    "affiliate_scaled",
+    "event_name",
+    "reps",
+    "time_ms",
+    "tiebreak_ms",
+    "judge_key",
+    "fingerprint",
+    "updated_at",
+]
+
+
+def upsert_stmt(model: type[Base], index_elements: list[str], update_columns: list[str]) -> Insert:
+    stmt = sqlite_insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={x: stmt.excluded[x] for x in update_columns if x not in index_elements},
+    )
+
+
+class CFIngestBatch:
+    """Turns validated CF rows into athlete and score upsert rows, skipping rows whose fingerprint is unchanged."""
+
+    def __init__(
+        self,
+        year: int,
+        affiliate_id: int,
+        existing_athletes: dict[tuple[int, int], tuple[UUID, str | None]],
+        existing_scores: dict[tuple[UUID, int], tuple[UUID, str | None]],
+        score_model: ScoreTable = Score,
+        *,
+        delta: bool = False,
+    ) -> None:
+        self.year = year
+        self.affiliate_id = affiliate_id
+        self.score_model = score_model
+        self.delta = delta
+        self.existing_athletes = existing_athletes
+        self.existing_scores = existing_scores
+        self.entrant_count = 0
+        self.athlete_counts = CFIngestCountModel()
+        self.score_counts = CFIngestCountModel()
+        self.athlete_ids: dict[tuple[int, int], UUID] = {}
+        self.seen_scores: set[tuple[UUID, int]] = set()
+        self.athlete_rows: list[dict] = []
+        self.score_rows: dict[tuple[UUID, int], dict] = {}
+        self.changed_ordinals: set[int] = set()
+        self.quarantined: list[dict] = []
+
+    @classmethod
+    async def load(
+        cls,
+        db_session: AsyncSession,
+        year: int,
+        affiliate_id: int,
+        score_model: ScoreTable = Score,
+        *,
+        delta: bool = False,
+    ) -> Self:
+        existing_athletes = await get_athlete_fingerprints(db_session=db_session, year=year)
+        existing_scores = await get_score_fingerprints(
+            db_session=db_session,
+            year=year,
+            affiliate_id=affiliate_id,
+            score_model=score_model,
+        )
+        return cls(
+            year=year,
+            affiliate_id=affiliate_id,
+            existing_athletes=existing_athletes,
+            existing_scores=existing_scores,
+            score_model=score_model,
+            delta=delta,
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self.athlete_rows) + len(self.score_rows)
+
+    def add_page(self, rows: list[CFValidatedRow], quarantined: list[dict]) -> None:
+        self.entrant_count += len(rows) + len([x for x in quarantined if x["kind"] == "entrant"])
+        for row in rows:
+            self.add(*row)
+        for x in quarantined:
+            log.warning("Quarantined CF %s %s: %s", x["kind"], x["payload"], x["error"])
+            self.quarantined.append(
+                {
+                    "year": self.year,
+                    "affiliate_id": self.affiliate_id,
+                    "kind": x["kind"],
+                    "payload": json.dumps(x["payload"]),
+                    "error": x["error"],
+                },
+            )
+
+    def add(
+        self,
+        entrant: dict,
+        scores: list[dict],
+        entrant_model: CFEntrantInputModel,
+        score_models: list[CFScoreInputModel],
+    ) -> None:
+        key = (entrant_model.competitor_id, self.year)
+        if key not in self.athlete_ids:
+            existing_athlete = self.existing_athletes.get(key)
+            self.athlete_ids[key] = existing_athlete[0] if existing_athlete else uuid4()
+            fingerprint = payload_fingerprint(entrant)
+            if classify_fingerprint(self.athlete_counts, existing_athlete, fingerprint):
+                self.athlete_rows.append(
+                    {
+                        **entrant_model.model_dump(),
+                        "id": self.athlete_ids[key],
+                        "year": self.year,
+                        "fingerprint": fingerprint,
+                    },
+                )
+        athlete_id = self.athlete_ids[key]
+
+        for score, score_model in zip(scores, score_models, strict=True):
+            score_key = (athlete_id, score_model.ordinal)
+            self.seen_scores.add(score_key)
+            fingerprint = payload_fingerprint(score)
+            existing_score = self.existing_scores.get(score_key)
+            if classify_fingerprint(self.score_counts, existing_score, fingerprint, force=not self.delta):
+                self.changed_ordinals.add(score_model.ordinal)
+                self.score_rows[score_key] = {
+                    **score_model.model_dump(),
+                    "athlete_id": athlete_id,
+                    "participation_score": PARTICIPATION_SCORE if score_model.score > 0 else 0,
+                    "fingerprint": fingerprint,
+                }
 
-    await apply_top3_score(db_session=db_session)
-    await apply_attendance_scores(db_session=db_session)
-    await apply_judge_score(db_session=db_session)
-    await apply_appreciation_score(db_session=db_session)
-    await apply_side_scores(db_session=db_session)
-    await apply_total_score(db_session=db_session)
-    await random_assign_athlete_prefs(db_session=db_session)
+    def take(self) -> tuple[list[dict], list[dict]]:
+        """Hand over the pending upsert rows and start a new batch."""
+        athlete_rows, score_rows = self.athlete_rows, list(self.score_rows.values())
+        self.athlete_rows, self.score_rows = [], {}
+        return athlete_rows, score_rows
 
-    return CFDataCountModel(
+    def stale_scores(self) -> dict[tuple[UUID, int], UUID]:
+        return {k: v[0] for k, v in self.existing_scores.items() if k not in self.seen_scores}
+
+    def count_model(self) -> CFDataCountModel:
+        return CFDataCountModel(
+            year=self.year,
+            affiliate_id=self.affiliate_id,
+            entrant_count=self.entrant_count,
+            # Scores the leaderboard holds now, written or unchanged
+            score_count=len(self.seen_scores),
+            athlete_counts=self.athlete_counts,
+            score_counts=self.score_counts,
+            quarantined_count=len(self.quarantined),
+            changed_ordinals=sorted(self.changed_ordinals),
+        )
+
+
+async def write_cf_rows(
+    db_session: AsyncSession,
+    athlete_rows: list[dict],
+    score_rows: list[dict],
+    score_model: ScoreTable = Score,
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+) -> None:
+    for chunk in batched(athlete_rows, chunk_size):
+        await db_session.execute(upsert_stmt(Athlete, ["competitor_id", "year"], ATHLETE_UPSERT_COLUMNS), chunk)
+    for chunk in batched(score_rows, chunk_size):
+        await db_session.execute(upsert_stmt(score_model, ["athlete_id", "ordinal"], SCORE_UPSERT_COLUMNS), chunk)
+
+
+async def finish_cf_ingest(
+    db_session: AsyncSession,
+    batch: CFIngestBatch,
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+) -> CFIngestBatch:
+    if batch.quarantined:
+        # Quarantined scores were not seen, so they must not be deleted as stale
+        log.warning("Skipping stale score cleanup, %s rows quarantined", len(batch.quarantined))
+    else:
+        stale_scores = batch.stale_scores()
+        for chunk in batched(stale_scores.values(), chunk_size):
+            await db_session.execute(delete(batch.score_model).where(batch.score_model.id.in_(chunk)))
+        batch.score_counts.deleted = len(stale_scores)
+        batch.changed_ordinals.update(ordinal for _, ordinal in stale_scores)
+
+    await db_session.execute(
+        delete(QuarantineRow).where(
+            (QuarantineRow.year == batch.year) & (QuarantineRow.affiliate_id == batch.affiliate_id),
+        ),
+    )
+    for chunk in batched(batch.quarantined, chunk_size):
+        await db_session.execute(insert(QuarantineRow), chunk)
+
+    await db_session.commit()
+    log.info("Athletes %s", batch.athlete_counts)
+    log.info("Scores %s", batch.score_counts)
+    return batch
+
+
+async def ingest_cf_data_bulk(  # noqa: PLR0913
+    db_session: AsyncSession,
+    year: int,
+    affiliate_id: int,
+    rows: list[CFValidatedRow],
+    quarantined: list[dict],
+    score_model: ScoreTable = Score,
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+    *,
+    delta: bool = False,
+) -> CFIngestBatch:
+    batch = await CFIngestBatch.load(
+        db_session=db_session,
         year=year,
         affiliate_id=affiliate_id,
-        entrant_count=len(entrant_list),
-        score_count=len(scores_list),
+        score_model=score_model,
+        delta=delta,
+    )
+    batch.add_page(rows, quarantined)
+
+    await write_cf_rows(db_session, *batch.take(), score_model=score_model, chunk_size=chunk_size)
+    return await finish_cf_ingest(db_session=db_session, batch=batch, chunk_size=chunk_size)
+
+
+async def stream_cf_targets(  # noqa: PLR0913
+    db_session: AsyncSession,
+    targets: list[RefreshTargetModel],
+    score_model: ScoreTable = Score,
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+    *,
+    delta: bool = False,
+    replay: bool = False,
+    stages: StageTimer | None = None,
+) -> None:
+    """
+    Download, validate and write CF data as overlapping stages.
+
+    Each target's page fetchers feed its own bounded page queue, and its validator turns pages into upsert chunks
+    on a shared bounded write queue. A single writer owns the db session and executes the chunks. Only a few pages
+    and chunks are held in memory at any time, however many targets run.
+    """
+    if stages is None:
+        stages = StageTimer()
+
+    batches = [
+        await CFIngestBatch.load(
+            db_session=db_session,
+            year=x.year,
+            affiliate_id=x.affiliate_id,
+            score_model=score_model,
+            delta=delta,
+        )
+        for x in targets
+    ]
+    write_queue: asyncio.Queue[tuple[list[dict], list[dict]] | None] = asyncio.Queue(maxsize=CF_STREAM_QUEUE_SIZE)
+    busy = {"download": 0.0, "validate": 0.0, "upsert": 0.0}
+
+    async def ingest_target(target: RefreshTargetModel, batch: CFIngestBatch) -> None:
+        page_queue: asyncio.Queue[list[dict] | None] = asyncio.Queue(maxsize=CF_STREAM_QUEUE_SIZE)
+
+        async def on_page(leaderboard_list: list[dict]) -> None:
+            target.page_count += 1
+            await page_queue.put(leaderboard_list)
+
+        async def produce() -> None:
+            download_start = time.perf_counter()
+            await fetch_cf_pages(target.affiliate_id, target.year, on_page, replay=replay)
+            await page_queue.put(None)
+            busy["download"] += time.perf_counter() - download_start
+
+        async def validate() -> None:
+            while (leaderboard_list := await page_queue.get()) is not None:
+                validate_start = time.perf_counter()
+                batch.add_page(
+                    *validate_cf_page(
+                        [x.get("entrant") for x in leaderboard_list],
+                        [x.get("scores") for x in leaderboard_list],
+                    ),
+                )
+                busy["validate"] += time.perf_counter() - validate_start
+                if batch.pending >= chunk_size:
+                    await write_queue.put(batch.take())
+            await write_queue.put(batch.take())
+
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(produce())
+            tg.create_task(validate())
+
+    async def produce_all() -> None:
+        await asyncio.gather(*[guard_cf_target(x, ingest_target(x, b)) for x, b in zip(targets, batches, strict=True)])
+        await write_queue.put(None)
+
+    async def write() -> None:
+        while (rows := await write_queue.get()) is not None:
+            write_start = time.perf_counter()
+            await write_cf_rows(db_session, *rows, score_model=score_model, chunk_size=chunk_size)
+            busy["upsert"] += time.perf_counter() - write_start
+
+    with stages.stage("ingest"):
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(produce_all())
+            tg.create_task(write())
+        for target, batch in zip(targets, batches, strict=True):
+            if target.state == "failed":
+                if score_model is ScoreStaging:
+                    await restore_target_staging(db_session=db_session, target=target)
+                continue
+            await finish_cf_ingest(db_session=db_session, batch=batch, chunk_size=chunk_size)
+            target.result = batch.count_model()
+            target.state = "done"
+            log.info("Streamed %s entrants for %s/%s", batch.entrant_count, target.affiliate_id, target.year)
+    for name, seconds in busy.items():
+        stages.record(name, seconds)
+
+
+async def reset_affiliate_scores(
+    db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
+) -> None:
+    update_stmt = update(score_model).values(
+        affiliate_rank=999,
+        top3_score=0,
+        attendance_score=0,
+        judge_score=0,
+        appreciation_score=0,
+        side_challenge_score=0,
+        spirit_score=0,
     )
+    if where is not None:
+        update_stmt = update_stmt.where(where)
+    await db_session.execute(update_stmt)
 
 
 async def apply_ranks(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    select_stmt = (
+    """A where narrows the ranking too, so it must keep or drop whole ordinals."""
+    ranks_stmt = (
         select(
-            Score.id,
+            score_model.id,
             func.rank()
             .over(
-                partition_by=[Score.ordinal, Athlete.gender, Athlete.mf_age_category, Score.affiliate_scaled],
-                order_by=[Score.scaled.asc(), Score.score.desc()],
+                partition_by=[
+                    Athlete.year,
+                    Athlete.affiliate_id,
+                    score_model.ordinal,
+                    Athlete.gender,
+                    Athlete.mf_age_category,
+                    score_model.affiliate_scaled,
+                ],
+                order_by=[score_model.scaled.asc(), score_model.score.desc()],
             )
             .label("affiliate_rank"),
         )
-        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .where((Athlete.team_name.not_in(IGNORE_TEAMS)) & (Score.score > 0))
+        .join_from(score_model, Athlete, score_model.athlete_id == Athlete.id)
+        .where((Athlete.team_name.not_in(IGNORE_TEAMS)) & (score_model.score > 0))
     )
-    ranks = await db_session.execute(select_stmt)
-    values = ranks.mappings().all()
-    await db_session.execute(update(Score), [dict(x) for x in values])
-    await db_session.commit()
+    if where is not None:
+        ranks_stmt = ranks_stmt.where(where)
+    ranks = ranks_stmt.subquery()
+    update_stmt = (
+        update(score_model).where(score_model.id == ranks.c.id).values(affiliate_rank=ranks.c.affiliate_rank)
+    )
+    await db_session.execute(update_stmt)
 
 
 async def apply_top3_score(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    await apply_ranks(db_session=db_session)
-    stmt = update(Score).where(Score.affiliate_rank <= 3).values(top3_score=TOP3_SCORE)  # noqa: PLR2004
-    await db_session.execute(stmt)
-    await db_session.commit()
+    await apply_ranks(db_session=db_session, score_model=score_model, where=where)
+    update_stmt = update(score_model).values(
+        top3_score=case((score_model.affiliate_rank <= 3, TOP3_SCORE), else_=0),  # noqa: PLR2004
+    )
+    if where is not None:
+        update_stmt = update_stmt.where(where)
+    await db_session.execute(update_stmt)
 
 
 async def apply_attendance_scores(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    select_stmt = select(Score.id).join_from(
-        Score,
-        Attendance,
-        (Score.athlete_id == Attendance.athlete_id) & (Score.ordinal == Attendance.ordinal),
-    )
-    update_stmt = (
-        update(Score).where(Score.id.in_(select_stmt.scalar_subquery())).values(attendance_score=ATTENDANCE_SCORE)
+    attended = (
+        select(Attendance.id)
+        .where((Attendance.athlete_id == score_model.athlete_id) & (Attendance.ordinal == score_model.ordinal))
+        .exists()
     )
-
+    update_stmt = update(score_model).values(attendance_score=case((attended, ATTENDANCE_SCORE), else_=0))
+    if where is not None:
+        update_stmt = update_stmt.where(where)
     await db_session.execute(update_stmt)
-    await db_session.commit()
+
+
+def judged_events(score_model: ScoreTable = Score) -> Subquery:
+    """Distinct judge keys of every event, year and affiliate, read once rather than per scored row."""
+    judged_score = aliased(score_model)
+    judged_athlete = aliased(Athlete)
+    return (
+        select(judged_athlete.year, judged_athlete.affiliate_id, judged_score.ordinal, judged_score.judge_key)
+        .join_from(judged_score, judged_athlete, judged_score.athlete_id == judged_athlete.id)
+        .where(judged_score.judge_key.is_not(None))
+        .distinct()
+        .subquery()
+    )
 
 
 async def apply_judge_score(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    select_judge_stmt = select(Score.judge_name, Score.ordinal).distinct()
-    result = await db_session.execute(select_judge_stmt)
-    judges = result.mappings().all()
-    for row in judges:
-        select_score_stmt = (
-            select(Score.id)
-            .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-            .where((Athlete.name == row.get("judge_name")) & (Score.ordinal == row.get("ordinal")))
-        )
-        update_stmt = (
-            update(Score).where(Score.id.in_(select_score_stmt.scalar_subquery())).values(judge_score=JUDGE_SCORE)
+    """An athlete scores judge points for an event if their normalized name judged any score of that event."""
+    judged = judged_events(score_model)
+    reset_stmt = update(score_model).values(judge_score=0)
+    judged_stmt = (
+        update(score_model)
+        .where(
+            (score_model.athlete_id == Athlete.id)
+            & (judged.c.judge_key == Athlete.name_key)
+            & (judged.c.ordinal == score_model.ordinal)
+            & (judged.c.year == Athlete.year)
+            & (judged.c.affiliate_id == Athlete.affiliate_id),
         )
-        await db_session.execute(update_stmt)
-
-    await db_session.commit()
+        .values(judge_score=JUDGE_SCORE)
+    )
+    if where is not None:
+        reset_stmt = reset_stmt.where(where)
+        judged_stmt = judged_stmt.where(where)
+    await db_session.execute(reset_stmt)
+    await db_session.execute(judged_stmt)
 
 
 async def apply_appreciation_score(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    appreciations = await Appreciation.find_all(async_session=db_session)
-
-    for appreciation in appreciations:
-        score = await Score.find(
-            async_session=db_session,
-            athlete_id=appreciation.athlete_id,
-            ordinal=appreciation.ordinal,
-        )
-        if score:
-            score.appreciation_score = appreciation.score
-            db_session.add(score)
-            await db_session.commit()
+    appreciation = (
+        select(Appreciation.score)
+        .where((Appreciation.athlete_id == score_model.athlete_id) & (Appreciation.ordinal == score_model.ordinal))
+        .scalar_subquery()
+    )
+    update_stmt = update(score_model).values(appreciation_score=func.coalesce(appreciation, 0))
+    if where is not None:
+        update_stmt = update_stmt.where(where)
+    await db_session.execute(update_stmt)
 
 
 async def apply_side_scores(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    side_scores = await SideScore.all(async_session=db_session)
-
-    for side_score in side_scores:
-        select_stmt = (
-            (
-                select(Score)
-                .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-                .where((Score.event_name == side_score.event_name) & (Athlete.team_name == side_score.team_name))
+    """
+    Side scores land on one score per team and event, the team leader's first.
+
+    A where narrows the ranking too, so it must keep or drop whole team and event groups.
+    """
+    team_rows_stmt = (
+        select(
+            score_model.id,
+            score_model.event_name,
+            Athlete.team_name,
+            is_public_target().label("public"),
+            func.row_number()
+            .over(
+                partition_by=[Athlete.year, Athlete.affiliate_id, score_model.event_name, Athlete.team_name],
+                order_by=[Athlete.team_leader.desc(), Athlete.name, score_model.id],
             )
-            .order_by(Athlete.team_leader.desc())
+            .label("team_row"),
+        )
+        .join_from(score_model, Athlete, score_model.athlete_id == Athlete.id)
+    )
+    if where is not None:
+        team_rows_stmt = team_rows_stmt.where(where)
+    team_rows = team_rows_stmt.subquery()
+
+    def side_score(score_type: str) -> ColumnElement[int]:
+        latest = (
+            select(SideScore.score)
+            .where(
+                (SideScore.event_name == team_rows.c.event_name)
+                & (SideScore.team_name == team_rows.c.team_name)
+                & (SideScore.score_type == score_type),
+            )
+            .order_by(SideScore.created_at.desc())
             .limit(1)
+            .scalar_subquery()
         )
-        result = await db_session.execute(select_stmt)
-        score = result.scalar_one_or_none()
+        # Side scores are entered for the configured target only, other years share its event names
+        return case(((team_rows.c.team_row == 1) & team_rows.c.public, func.coalesce(latest, 0)), else_=0)
 
-        if score:
-            if side_score.score_type == "side_challenge":
-                score.side_challenge_score = side_score.score
-                db_session.add(score)
-                await db_session.commit()
-            elif side_score.score_type == "spirit":
-                score.spirit_score = side_score.score
-                db_session.add(score)
-                await db_session.commit()
+    update_stmt = (
+        update(score_model)
+        .where(score_model.id == team_rows.c.id)
+        .values(side_challenge_score=side_score("side_challenge"), spirit_score=side_score("spirit"))
+    )
+    await db_session.execute(update_stmt)
 
 
 async def apply_total_score(
     db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    where: ColumnElement[bool] | None = None,
 ) -> None:
-    update_stmt = update(Score).values(
-        total_score=Score.participation_score
-        + Score.top3_score
-        + Score.attendance_score
-        + Score.judge_score
-        + Score.appreciation_score
-        + Score.side_challenge_score
-        + Score.spirit_score,
+    update_stmt = update(score_model).values(
+        total_score=score_model.participation_score
+        + score_model.top3_score
+        + score_model.attendance_score
+        + score_model.judge_score
+        + score_model.appreciation_score
+        + score_model.side_challenge_score
+        + score_model.spirit_score,
     )
+    if where is not None:
+        update_stmt = update_stmt.where(where)
     await db_session.execute(update_stmt)
+
+
+SCORING_PIPELINE = [
+    reset_affiliate_scores,
+    apply_top3_score,
+    apply_attendance_scores,
+    apply_judge_score,
+    apply_appreciation_score,
+    apply_side_scores,
+    apply_total_score,
+]
+
+
+async def apply_scoring_pipeline(
+    db_session: AsyncSession,
+    score_model: ScoreTable = Score,
+    engine: ScoringEngine = SCORING_ENGINE,
+    stages: StageTimer | None = None,
+    ordinals: set[int] | None = None,
+) -> None:
+    """
+    Score every row, or only the rows of the given ordinals, in one transaction.
+
+    The sql engine runs each SCORING_PIPELINE step as a single set-based UPDATE. The numpy engine computes all
+    components in memory and writes them back in one bulk UPDATE.
+    """
+    if stages is None:
+        stages = StageTimer()
+    if ordinals is not None:
+        log.info("Rescoring ordinals %s", sorted(ordinals))
+        if not ordinals:
+            return
+
+    if engine == "numpy":
+        # numpy is an optional dependency, only needed when this engine is picked
+        from app.cf_games.scoring import apply_vectorized_scoring  # noqa: PLC0415
+
+        await apply_vectorized_scoring(db_session=db_session, score_model=score_model, stages=stages, ordinals=ordinals)
+    else:
+        where = None if ordinals is None else score_model.ordinal.in_(ordinals)
+        for step in SCORING_PIPELINE:
+            with stages.stage(step.__name__):
+                await step(db_session=db_session, score_model=score_model, where=where)
+    await db_session.commit()
+
+
+async def recompute_scores(
+    db_session: AsyncSession,
+    steps: list[Callable[..., Awaitable[None]]],
+    where: Callable[[ScoreTable], ColumnElement[bool]],
+) -> None:
+    """
+    Re-run some scoring steps and the total for just the score rows matching where, in one transaction.
+
+    An edit made while a refresh is running waits for its swap and then applies to the new live scores, instead of
+    writing staging under the refresh's write transaction or being copied over by its next prepare.
+    """
+    async with score_write_lock:
+        for step in [*steps, apply_total_score]:
+            await step(db_session=db_session, score_model=Score, where=where(Score))
+        await rebuild_score_read_models(db_session=db_session)
+        await db_session.commit()
+
+
+async def recompute_athlete_event_scores(
+    db_session: AsyncSession,
+    athlete_id: UUID,
+    ordinal: int,
+) -> None:
+    """Pick up an attendance or appreciation edit without a refresh."""
+    await recompute_scores(
+        db_session=db_session,
+        steps=[apply_attendance_scores, apply_appreciation_score],
+        where=lambda score_model: (score_model.athlete_id == athlete_id) & (score_model.ordinal == ordinal),
+    )
+
+
+async def recompute_team_event_scores(
+    db_session: AsyncSession,
+    team_name: str,
+    event_name: str,
+) -> None:
+    """Pick up a side score edit without a refresh."""
+    team_athletes = select(Athlete.id).where(Athlete.team_name == team_name)
+    await recompute_scores(
+        db_session=db_session,
+        steps=[apply_side_scores],
+        where=lambda score_model: (
+            (score_model.event_name == event_name) & score_model.athlete_id.in_(team_athletes.scalar_subquery())
+        ),
+    )
+
+
+SCORE_COLUMNS = [x.name for x in ScoreStaging.__table__.columns]
+SCORE_TABLE_COLUMNS = [Score.__table__.c[x] for x in SCORE_COLUMNS]
+STAGING_TABLE_COLUMNS = [ScoreStaging.__table__.c[x] for x in SCORE_COLUMNS]
+
+
+async def prepare_score_staging(
+    db_session: AsyncSession,
+) -> None:
+    """Seed the staging table with the live scores, so targets not refreshed keep theirs and deltas can diff."""
+    await db_session.execute(delete(ScoreStaging))
+    await db_session.execute(insert(ScoreStaging).from_select(SCORE_COLUMNS, select(*SCORE_TABLE_COLUMNS)))
     await db_session.commit()
+
+
+def target_athlete_ids(target: RefreshTargetModel) -> Select:
+    return select(Athlete.id).where((Athlete.year == target.year) & (Athlete.affiliate_id == target.affiliate_id))
+
+
+async def restore_target_staging(
+    db_session: AsyncSession,
+    target: RefreshTargetModel,
+) -> None:
+    """Drop the chunks a failed target wrote to staging before it failed and put its live scores back."""
+    athlete_ids = target_athlete_ids(target=target)
+    await db_session.execute(delete(ScoreStaging).where(ScoreStaging.athlete_id.in_(athlete_ids)))
+    await db_session.execute(
+        insert(ScoreStaging).from_select(
+            SCORE_COLUMNS,
+            select(*SCORE_TABLE_COLUMNS).where(Score.athlete_id.in_(athlete_ids)),
+        ),
+    )
+    await db_session.commit()
+    log.warning("Restored the live scores of failed target %s/%s", target.affiliate_id, target.year)
+
+
+async def swap_score_staging(
+    db_session: AsyncSession,
+) -> None:
+    """
+    Replace the live scores and their read models with the staged scores in one short write transaction.
+
+    The changed ranks and totals are appended to the score history in the same transaction.
+    """
+    await db_session.execute(delete(Score))
+    await db_session.execute(insert(Score).from_select(SCORE_COLUMNS, select(*STAGING_TABLE_COLUMNS)))
+    await db_session.execute(delete(ScoreStaging))
+    await rebuild_score_read_models(db_session=db_session)
+    await record_score_history(db_session=db_session)
+    await db_session.commit()
+
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.appreciation.models import Appreciation
+from app.athlete.models import Athlete, is_public_target
+from app.attendance.models import Attendance
+from app.cf_games.constants import DEFAULT_APPRECIATION_SCORE, IGNORE_TEAMS
+from app.cf_games.schemas import ScoreSnapshotModel, ScoringWeightsModel, TeamScoreCountsModel, TeamStandingModel
+from app.score.models import Score
+
+log = logging.getLogger("uvicorn.error")
+
+
+async def load_score_snapshot(db_session: AsyncSession) -> ScoreSnapshotModel:
+    """Count, per team, the score rows that earn each weighted component, from scores, attendance and appreciation."""
+    attended = (
+        select(Attendance.id)
+        .where((Attendance.athlete_id == Score.athlete_id) & (Attendance.ordinal == Score.ordinal))
+        .exists()
+    )
+    appreciation = (
+        select(Appreciation.score)
+        .where((Appreciation.athlete_id == Score.athlete_id) & (Appreciation.ordinal == Score.ordinal))
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            Athlete.team_name,
+            func.count().filter(Score.score > 0).label("participation_count"),
+            func.count().filter(Score.affiliate_rank <= 3).label("top3_count"),  # noqa: PLR2004
+            func.count().filter(attended).label("attendance_count"),
+            func.count().filter(Score.judge_score > 0).label("judge_count"),
+            func.count().filter(appreciation == DEFAULT_APPRECIATION_SCORE).label("appreciation_count"),
+            func.coalesce(func.sum(appreciation).filter(appreciation != DEFAULT_APPRECIATION_SCORE), 0).label(
+                "appreciation_custom_score",
+            ),
+            func.sum(Score.side_challenge_score + Score.spirit_score).label("side_score"),
+        )
+        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
+        .where(is_public_target() & Athlete.team_name.not_in(IGNORE_TEAMS))
+        .group_by(Athlete.team_name)
+    )
+    result = await db_session.execute(stmt)
+    return ScoreSnapshotModel(
+        loaded_at=dt.datetime.now(dt.UTC),
+        teams=[TeamScoreCountsModel(**x) for x in result.mappings()],
+    )
+
+
+def rank_teams(scores: dict[str, int]) -> dict[str, int]:
+    """Competition ranks, highest score first: 1, 2, 2, 4."""
+    ordered = sorted(scores.values(), reverse=True)
+    return {team_name: ordered.index(score) + 1 for team_name, score in scores.items()}
+
+
+def simulate_team_standings(
+    snapshot: ScoreSnapshotModel,
+    weights: ScoringWeightsModel,
+) -> list[TeamStandingModel]:
+    """Team standings under the live weights and under alternative ones, ordered by the simulated standings."""
+    current_weights = ScoringWeightsModel()
+    current = {x.team_name: x.total_score(current_weights) for x in snapshot.teams}
+    simulated = {x.team_name: x.total_score(weights) for x in snapshot.teams}
+    current_ranks = rank_teams(current)
+    simulated_ranks = rank_teams(simulated)
+    standings = [
+        TeamStandingModel(
+            team_name=team_name,
+            current_score=current[team_name],
+            current_rank=current_ranks[team_name],
+            simulated_score=simulated[team_name],
+            simulated_rank=simulated_ranks[team_name],
+        )
+        for team_name in current
+    ]
+    return sorted(standings, key=lambda x: (x.simulated_rank, x.team_name))
+
+
+class ScoreSimulator:
+    """Holds one read-only score snapshot in memory, so what-if weights never touch the database."""
+
+    def __init__(self) -> None:
+        self.snapshot: ScoreSnapshotModel | None = None
+
+    async def get_snapshot(self, db_session: AsyncSession, *, reload: bool = False) -> ScoreSnapshotModel:
+        if self.snapshot is None or reload:
+            self.snapshot = await load_score_snapshot(db_session=db_session)
+            log.info("Loaded score snapshot of %s teams", len(self.snapshot.teams))
+        return self.snapshot
+
+
+score_simulator = ScoreSimulator()
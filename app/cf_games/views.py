@@ -1,13 +1,18 @@
 import logging
+from typing import Annotated
 
-from fastapi import APIRouter, Request, status
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Form, Request, Response, status
+from fastapi.responses import HTMLResponse, RedirectResponse
 
 from app.auth.service import authenticate_request
-from app.cf_games.constants import AFFILIATE_ID, YEAR
-from app.cf_games.service import process_cf_data
+from app.cf_games.constants import SCORING_ENGINE
+from app.cf_games.jobs import refresh_job_runner
+from app.cf_games.schemas import ScoringEngine, ScoringWeightsModel
+from app.cf_games.simulator import score_simulator, simulate_team_standings
 from app.database.dependencies import db_dependency
-from app.exceptions import unauthorised_exception
+from app.exceptions import bad_request_exception, unauthorised_exception
+from app.ui.publish import static_site_publisher
+from app.ui.template import templates
 
 log = logging.getLogger("uvicorn.error")
 
@@ -15,14 +20,143 @@ cf_games_router = APIRouter()
 
 
 @cf_games_router.get("/refresh", status_code=status.HTTP_200_OK)
-async def refresh_cf_games_data(
+async def refresh_cf_games_data(  # noqa: PLR0913
+    request: Request,
+    year: int | None = None,
+    affiliate_id: int | None = None,
+    targets: str | None = None,
+    bulk: bool = True,
+    delta: bool = False,
+    stream: bool = True,
+    replay: bool = False,
+    engine: ScoringEngine = SCORING_ENGINE,
+) -> Response:
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    refresh_job_runner.start(
+        targets=parse_refresh_targets(targets=targets, affiliate_id=affiliate_id, year=year),
+        bulk=bulk,
+        delta=delta,
+        stream=stream,
+        replay=replay,
+        engine=engine,
+    )
+    if "HX-Request" in request.headers:
+        return get_refresh_status_partial(request)
+    return RedirectResponse("/")
+
+
+@cf_games_router.get("/refresh/status", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+async def get_refresh_status(request: Request) -> Response:
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    return get_refresh_status_partial(request)
+
+
+@cf_games_router.put("/refresh/schedule", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+async def put_refresh_schedule(
+    request: Request,
+    interval_minutes: Annotated[int, Form()],
+) -> Response:
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    refresh_job_runner.schedule(max(interval_minutes, 0))
+    return get_refresh_status_partial(request)
+
+
+@cf_games_router.post("/publish", status_code=status.HTTP_200_OK)
+async def publish_static_site(request: Request) -> Response:
+    """Re-render the static site now, e.g. after a template change. Data changes republish on their own."""
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    await static_site_publisher.publish(force=True)
+    return RedirectResponse("/", status_code=status.HTTP_303_SEE_OTHER)
+
+
+@cf_games_router.get("/simulator", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+async def get_simulator_page(
+    request: Request,
+    db_session: db_dependency,
+    reload: bool = False,
+) -> Response:
+    user = authenticate_request(request)
+    if not user:
+        raise unauthorised_exception()
+
+    snapshot = await score_simulator.get_snapshot(db_session=db_session, reload=reload)
+    weights = ScoringWeightsModel()
+    return templates.TemplateResponse(
+        request=request,
+        name="pages/simulator.jinja2",
+        context={
+            "snapshot": snapshot,
+            "weights": weights,
+            "standings": simulate_team_standings(snapshot=snapshot, weights=weights),
+        },
+    )
+
+
+@cf_games_router.post("/simulator", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+async def post_simulator_weights(  # noqa: PLR0913
     request: Request,
     db_session: db_dependency,
-    year: int = int(YEAR),
-    affiliate_id: int = int(AFFILIATE_ID),
-) -> RedirectResponse:
+    participation: Annotated[int, Form()],
+    top3: Annotated[int, Form()],
+    judge: Annotated[int, Form()],
+    attendance: Annotated[int, Form()],
+    appreciation: Annotated[int, Form()],
+) -> Response:
     user = authenticate_request(request)
-    if user:
-        await process_cf_data(db_session=db_session, affiliate_id=affiliate_id, year=year)
-        return RedirectResponse("/")
-    raise unauthorised_exception()
+    if not user:
+        raise unauthorised_exception()
+
+    snapshot = await score_simulator.get_snapshot(db_session=db_session)
+    weights = ScoringWeightsModel(
+        participation=participation,
+        top3=top3,
+        judge=judge,
+        attendance=attendance,
+        appreciation=appreciation,
+    )
+    return templates.TemplateResponse(
+        request=request,
+        name="partials/simulator_table.jinja2",
+        context={
+            "snapshot": snapshot,
+            "standings": simulate_team_standings(snapshot=snapshot, weights=weights),
+        },
+    )
+
+
+def parse_refresh_targets(
+    targets: str | None,
+    affiliate_id: int | None,
+    year: int | None,
+) -> list[tuple[int, int]] | None:
+    """Targets come as "affiliate:year,affiliate:year". None means the configured CF_REFRESH_TARGETS."""
+    if targets:
+        try:
+            return [(int(x), int(y)) for x, y in (target.split(":") for target in targets.split(","))]
+        except ValueError as e:
+            raise bad_request_exception(f"Invalid refresh targets {targets!r}") from e
+    if affiliate_id is not None and year is not None:
+        return [(affiliate_id, year)]
+    return None
+
+
+def get_refresh_status_partial(request: Request) -> Response:
+    return templates.TemplateResponse(
+        request=request,
+        name="partials/refresh_status.jinja2",
+        context={
+            "job": refresh_job_runner.status,
+        },
+    )
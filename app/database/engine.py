@@ -4,6 +4,7 @@ import logging
 from contextlib import asynccontextmanager
 from typing import TYPE_CHECKING, Any
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.database.exceptions import DBSessionNotInitializedError
@@ -15,12 +16,22 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+def set_sqlite_pragma(dbapi_connection: Any, _: Any) -> None:  # noqa: ANN401
+    # WAL lets readers keep reading the last committed leaderboard while a refresh writes
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 class SessionManager:
     def __init__(self, host: str, /, *, kwargs: dict[str, Any] | None = None) -> None:
         if kwargs is None:
             kwargs = {}
 
         self.engine: AsyncEngine | None = create_async_engine(str(host), **kwargs)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine.sync_engine, "connect", set_sqlite_pragma)
         self._session_maker: async_sessionmaker[AsyncSession] | None = async_sessionmaker(
             autocommit=False,
             bind=self.engine,
@@ -0,0 +1,84 @@
+"""
+Data generation, bumped in the same transaction as every session commit that changes the public pages' data.
+
+It is stored in the data_version row, so HTTP validators derived from it never repeat across restarts. It is
+mirrored in process so readers never query it. Caches of data read from the database key on it, so a public write
+invalidates them without tracking what changed. Writes that only touch staging, quarantine, prefs or other admin data
+leave it alone, so a refresh moves it once, at the swap. Every write to the public data, the score read models and
+the athletes' teams, ends in rebuild_score_read_models, which marks its session with bump_on_commit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Connection, event, select, update
+from sqlalchemy.orm import Session
+
+from app.database.models import DataVersion
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+PUBLIC_WRITE = "data_generation_public_write"
+NEXT_VERSION = "data_generation_next"
+
+
+class DataGeneration:
+    def __init__(self) -> None:
+        self.value = 0
+        self.modified_at: dt.datetime | None = None
+        self.moved = asyncio.Event()
+
+    def set(self, value: int, modified_at: dt.datetime) -> None:
+        # Commits finishing out of order must not move it back
+        if value < self.value:
+            return
+        self.value = value
+        # SQLite hands back naive datetimes, they are stored in UTC
+        self.modified_at = modified_at.replace(tzinfo=dt.UTC)
+        self.moved.set()
+        self.moved = asyncio.Event()
+
+    async def wait_past(self, generation: int) -> int:
+        """Wait until the generation moves past the given one and return the new value."""
+        while self.value <= generation:
+            await self.moved.wait()
+        return self.value
+
+    def load(self, connection: Connection) -> None:
+        row = connection.execute(select(DataVersion.generation, DataVersion.updated_at)).first()
+        if row:
+            self.set(*row)
+
+
+data_generation = DataGeneration()
+
+
+def bump_on_commit(db_session: AsyncSession | Session) -> None:
+    """Bump the data generation when this session next commits, for writes that change public data."""
+    db_session.info[PUBLIC_WRITE] = True
+
+
+@event.listens_for(Session, "before_commit")
+def bump_stored_generation(session: Session) -> None:
+    if session.info.pop(PUBLIC_WRITE, False):
+        stmt = update(DataVersion).values(generation=DataVersion.generation + 1)
+        row = session.execute(stmt.returning(DataVersion.generation, DataVersion.updated_at)).first()
+        session.info[NEXT_VERSION] = row or (data_generation.value + 1, dt.datetime.now(dt.UTC))
+
+
+@event.listens_for(Session, "after_commit")
+def apply_stored_generation(session: Session) -> None:
+    session.info.pop(PUBLIC_WRITE, None)
+    version = session.info.pop(NEXT_VERSION, None)
+    if version:
+        data_generation.set(*version)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_write(session: Session) -> None:
+    session.info.pop(PUBLIC_WRITE, None)
+    session.info.pop(NEXT_VERSION, None)
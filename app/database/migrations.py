@@ -0,0 +1,173 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in SQLite's PRAGMA user_version. Startup applies every migration past it, in order, and bumps
+the version after each. A fresh database runs them all: the baseline creates only the tables that existed when
+migrations were introduced, and every later table comes from its own step. Migrations must stay idempotent, since the
+baseline tables get their current columns and indexes. Append new migrations, never edit or reorder applied ones.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import Column, Connection, Table, bindparam, insert, inspect, select, text, update
+
+from app.appreciation.models import Appreciation
+from app.athlete.models import Athlete, normalize_name
+from app.athlete_prefs.models import AthleteRXPref, AthleteTimePref
+from app.attendance.models import Attendance
+from app.cf_games.models import QuarantineRow
+from app.database.base import Base
+from app.database.models import DataVersion
+from app.score.models import (
+    AthleteScoreRow,
+    LeaderboardRow,
+    Score,
+    ScoreGeneration,
+    ScoreHistory,
+    ScoreStaging,
+    SideScore,
+    TeamEventScore,
+    TeamScoreHistory,
+    TeamTotalScore,
+)
+
+log = logging.getLogger("uvicorn.error")
+
+
+BASELINE_TABLES = [
+    Appreciation.__table__,
+    Athlete.__table__,
+    AthleteRXPref.__table__,
+    AthleteTimePref.__table__,
+    Attendance.__table__,
+    Score.__table__,
+    ScoreStaging.__table__,
+    SideScore.__table__,
+    QuarantineRow.__table__,
+    TeamEventScore.__table__,
+    TeamTotalScore.__table__,
+    LeaderboardRow.__table__,
+    AthleteScoreRow.__table__,
+]
+
+
+def create_tables(connection: Connection) -> None:
+    """Baseline: the tables that existed before versioned migrations, which startup used to create_all."""
+    Base.metadata.create_all(connection, tables=BASELINE_TABLES)
+
+
+def add_column(connection: Connection, column: Column) -> None:
+    existing = {x["name"] for x in inspect(connection).get_columns(column.table.name)}
+    if column.name not in existing:
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def add_unique_index(connection: Connection, table: Table, *columns: str) -> None:
+    """SQLite can't add a constraint to an existing table, but a unique index serves ON CONFLICT the same."""
+    unique = [x["column_names"] for x in inspect(connection).get_unique_constraints(table.name)]
+    if list(columns) not in unique:
+        # Plain DDL, an Index on the model table would join the metadata and every later create_all
+        name = f"uq_{table.name}_{'_'.join(columns)}"
+        connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table.name} ({', '.join(columns)})"))
+
+
+def backfill_name_key(connection: Connection, column: Column, source: Column) -> None:
+    table = column.table
+    rows = connection.execute(select(table.c.id, source).where(column.is_(None))).all()
+    if rows:
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("row_id", type_=table.c.id.type))
+            .values({column.name: bindparam("key")})
+        )
+        connection.execute(stmt, [{"row_id": row_id, "key": normalize_name(name)} for row_id, name in rows])
+
+
+def add_ingest_columns(connection: Connection) -> None:
+    """Columns and unique keys the bulk ingest relies on, for databases created before it."""
+    athlete, score = Athlete.__table__, Score.__table__
+    for column in (athlete.c.name_key, athlete.c.fingerprint, score.c.judge_key, score.c.fingerprint):
+        add_column(connection, column)
+    backfill_name_key(connection, athlete.c.name_key, athlete.c.name)
+    backfill_name_key(connection, score.c.judge_key, score.c.judge_name)
+    for index in (*athlete.indexes, *score.indexes):
+        if index.name in ("ix_athlete_name_key", "ix_score_judge_key"):
+            index.create(connection, checkfirst=True)
+    add_unique_index(connection, athlete, "competitor_id", "year")
+    add_unique_index(connection, score, "athlete_id", "ordinal")
+
+
+HOT_PATH_INDEXES = [
+    "ix_athlete_year_affiliate_id",
+    "ix_athlete_team_name_team_leader_name",
+    "ix_athlete_team_name_mf_age_category_gender",
+    "ix_side_score_team_name_event_name_score_type_created_at",
+    "ix_team_total_score_overall_score",
+    "ix_quarantine_row_year_affiliate_id",
+]
+
+
+def create_hot_path_indexes(connection: Connection) -> None:
+    """Composite indexes matching the filters and ORDER BYs of the page and admin queries."""
+    tables = [Athlete.__table__, SideScore.__table__, TeamTotalScore.__table__, QuarantineRow.__table__]
+    for index in (x for table in tables for x in table.indexes):
+        if index.name in HOT_PATH_INDEXES:
+            index.create(connection, checkfirst=True)
+
+
+def create_score_history_tables(connection: Connection) -> None:
+    tables = [ScoreGeneration.__table__, ScoreHistory.__table__, TeamScoreHistory.__table__]
+    Base.metadata.create_all(connection, tables=tables)
+
+
+def create_data_version(connection: Connection) -> None:
+    Base.metadata.create_all(connection, tables=[DataVersion.__table__])
+    if connection.execute(select(DataVersion.id)).first() is None:
+        connection.execute(insert(DataVersion))
+
+
+def create_athlete_score_page_index(connection: Connection) -> None:
+    for index in AthleteScoreRow.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def create_judge_match_index(connection: Connection) -> None:
+    """Lets judge scoring look up the athletes of each judge key, instead of every athlete of the year and affiliate."""
+    for index in Athlete.__table__.indexes:
+        if index.name == "ix_athlete_name_key_year_affiliate_id":
+            index.create(connection, checkfirst=True)
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    create_tables,
+    add_ingest_columns,
+    create_hot_path_indexes,
+    create_score_history_tables,
+    create_data_version,
+    create_athlete_score_page_index,
+    create_judge_match_index,
+]
+
+
+def get_schema_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(connection: Connection) -> None:
+    """Apply the migrations past the database's schema version."""
+    version = get_schema_version(connection)
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number > version:
+            log.info("Applying migration %s: %s", number, migration.__name__)
+            migration(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {number}")
+
+
+def reset_schema(connection: Connection) -> None:
+    """Drop every table and the schema version, so migrate rebuilds from scratch."""
+    Base.metadata.drop_all(connection)
+    connection.exec_driver_sql("PRAGMA user_version = 0")
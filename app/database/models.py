@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database.base import Base
+
+
+class DataVersion(Base):
+    """Single row. generation counts commits that changed public data, updated_at dates the last one."""
+
+    generation: Mapped[int] = mapped_column(Integer, default=0)
@@ -32,3 +32,12 @@ def not_found_exception(detail: str | None = None) -> HTTPException:
         status_code=status.HTTP_404_NOT_FOUND,
         detail=detail,
     )
+
+
+def bad_request_exception(detail: str | None = None) -> HTTPException:
+    if not detail:
+        detail = "Bad request"
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=detail,
+    )
@@ -8,22 +8,46 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.auth.service import add_item_to_header, create_access_token, verify_token
-from app.database.base import Base
+from app.cf_games.client import cf_api_client
+from app.cf_games.constants import AUTO_REFRESH_INTERVAL_MINUTES, PUBLISH_STATIC_SITE
+from app.cf_games.jobs import refresh_job_runner
 from app.database.engine import session_manager
-from app.ui.template import templates
+from app.database.generation import data_generation
+from app.database.migrations import migrate, reset_schema
+from app.score.live import live_score_broadcaster
+from app.score.service import leading_teams, rebuild_score_read_models
+from app.settings import template_settings
+from app.ui.publish import static_site_publisher
+from app.ui.template import precompile_templates, templates
 from app.ui.views import router
 
 RESET_DB = False
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncGenerator:
+async def lifespan(fastapi_app: FastAPI) -> AsyncGenerator:
     # Run pre-load stuff
-    if RESET_DB:
-        async with session_manager.connect() as conn:
-            await conn.run_sync(Base.metadata.drop_all)
-            await conn.run_sync(Base.metadata.create_all)
+    if template_settings.production:
+        precompile_templates(templates)
+    async with session_manager.connect() as conn:
+        if RESET_DB:
+            await conn.run_sync(reset_schema)
+        await conn.run_sync(migrate)
+        await conn.run_sync(data_generation.load)
+    async with session_manager.session() as db_session:
+        await rebuild_score_read_models(db_session=db_session)
+        await db_session.commit()
+    cf_api_client.open()
+    static_site_publisher.open(fastapi_app)
+    if PUBLISH_STATIC_SITE:
+        static_site_publisher.start()
+    live_score_broadcaster.start()
+    refresh_job_runner.schedule(AUTO_REFRESH_INTERVAL_MINUTES)
     yield
+    await refresh_job_runner.stop()
+    await static_site_publisher.stop()
+    await live_score_broadcaster.stop()
+    await cf_api_client.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -55,6 +79,15 @@ async def get_404(request: Request) -> Response:
     return response
 
 
+@app.middleware("http")
+async def refresh_leading_teams(request: Request, call_next: Callable) -> Response:
+    # The page header shows them, so bring them up to date before any template renders
+    if leading_teams.stale:
+        async with session_manager.session() as db_session:
+            await leading_teams.refresh(db_session=db_session)
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def add_admin_headers(request: Request, call_next: Callable) -> Response:
     access_token = request.cookies.get("access_token")
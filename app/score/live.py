@@ -0,0 +1,196 @@
+"""
+Live score push over Server-Sent Events.
+
+One broadcaster per process watches the data generation. When it moves, it reads the team score and leaderboard read
+models once, compares them to what it read last time and hands each connected client only the cells and rows that
+changed. A change of layout (teams, categories or row counts) is sent as a single reload event instead.
+
+A page that connects after its topic changed gets the topic's current cells and rows, never a reload: the reload
+request may be answered by a cached or published copy of that same page, which would reconnect and reload again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cf_games.constants import EVENT_NAMES, LIVE_SCORES_KEEPALIVE_SECONDS
+from app.database.engine import session_manager
+from app.database.generation import data_generation
+from app.score.service import get_db_team_scores, get_leaderboard_scores, get_total_scores
+from app.ui.template import templates
+
+log = logging.getLogger("uvicorn.error")
+
+TEAM_SCORE_FIELDS = (
+    "count",
+    "participation",
+    "top3_score",
+    "attendance_score",
+    "judge_score",
+    "appreciation_score",
+    "side_challenge_score",
+    "spirit_score",
+    "total_score",
+)
+
+# Layout of a topic and the data of each of its events
+TopicState = tuple[tuple, dict[str, str]]
+
+
+def team_scores_topic(ordinal: int) -> str:
+    return f"team_scores-{ordinal}"
+
+
+def leaderboard_topic(ordinal: int) -> str:
+    return f"leaderboard-{ordinal}"
+
+
+def reload_event(topic: str) -> str:
+    return f"{topic}-reload"
+
+
+async def get_team_scores_state(db_session: AsyncSession, ordinal: int) -> TopicState:
+    scores = await get_db_team_scores(db_session=db_session, ordinal=ordinal)
+    overall_score = await get_total_scores(db_session=db_session)
+    events = {}
+    for position, team in enumerate(scores.values(), start=1):
+        for field in TEAM_SCORE_FIELDS:
+            events[f"team-{ordinal}-{position}-{field}"] = str(team[field])
+    for position, team in enumerate(overall_score.values(), start=1):
+        events[f"team-{ordinal}-{position}-overall_score"] = str(team["overall_score"])
+    return (tuple(scores), tuple(overall_score)), events
+
+
+async def get_leaderboard_state(db_session: AsyncSession, ordinal: int) -> TopicState:
+    leaderboard = await get_leaderboard_scores(db_session=db_session, ordinal=ordinal)
+    template = templates.get_template("partials/leaderboard_row.jinja2")
+    events = {}
+    for category_position, rows in enumerate(leaderboard.values(), start=1):
+        for position, athlete in enumerate(rows, start=1):
+            events[f"leaderboard-{ordinal}-{category_position}-{position}"] = template.render(athlete=athlete)
+    return tuple((category, len(rows)) for category, rows in leaderboard.items()), events
+
+
+async def get_live_state(db_session: AsyncSession) -> dict[str, TopicState]:
+    state = {}
+    for ordinal in EVENT_NAMES:
+        state[team_scores_topic(ordinal)] = await get_team_scores_state(db_session=db_session, ordinal=ordinal)
+        state[leaderboard_topic(ordinal)] = await get_leaderboard_state(db_session=db_session, ordinal=ordinal)
+    return state
+
+
+def format_event(name: str, data: str) -> str:
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {name}\n{lines}\n"
+
+
+class LiveScoreClient:
+    """
+    One SSE connection. Changes wait in a dict keyed by event, so a client that reads slower than scores change
+    skips straight to the latest value of each cell and never holds more than one page worth of events.
+    """
+
+    def __init__(self, topic: str) -> None:
+        self.topic = topic
+        self.pending: dict[str, str] = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, events: dict[str, str]) -> None:
+        self.pending.update(events)
+        self.ready.set()
+
+    async def next_events(self, timeout: float) -> dict[str, str]:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        self.ready.clear()
+        events, self.pending = self.pending, {}
+        return events
+
+
+class LiveScoreBroadcaster:
+    def __init__(self) -> None:
+        self.clients: set[LiveScoreClient] = set()
+        self.state: dict[str, TopicState] = {}
+        # Generation at which each topic's state last changed
+        self.changed_at: dict[str, int] = {}
+        self.task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    async def _run(self) -> None:
+        generation = data_generation.value
+        while True:
+            try:
+                await self.push_changes(generation=generation)
+            except Exception:
+                log.exception("Live score push failed at generation %s", generation)
+            generation = await data_generation.wait_past(generation)
+
+    async def push_changes(self, generation: int) -> None:
+        async with session_manager.session() as db_session:
+            state = await get_live_state(db_session=db_session)
+
+        changes: dict[str, dict[str, str]] = {}
+        for topic, (layout, events) in state.items():
+            previous = self.state.get(topic)
+            if previous is None:
+                self.changed_at[topic] = generation
+                continue
+            previous_layout, previous_events = previous
+            if layout != previous_layout:
+                changes[topic] = {reload_event(topic): str(generation)}
+            else:
+                changed = {name: data for name, data in events.items() if previous_events.get(name) != data}
+                if changed:
+                    changes[topic] = changed
+        for topic in changes:
+            self.changed_at[topic] = generation
+        self.state = state
+
+        for client in self.clients:
+            if client.topic in changes:
+                client.offer(changes[client.topic])
+        if changes:
+            log.info("Pushed live score changes of %s topics to %s clients", len(changes), len(self.clients))
+
+    def subscribe(self, topic: str, generation: int | None) -> LiveScoreClient:
+        client = LiveScoreClient(topic=topic)
+        # The page was rendered before its topic last changed, send the current state of every cell and row
+        if generation is not None and topic in self.state and generation < self.changed_at[topic]:
+            client.offer(self.state[topic][1])
+        self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client: LiveScoreClient) -> None:
+        self.clients.discard(client)
+
+    async def stream(self, client: LiveScoreClient) -> AsyncGenerator[str, Any]:
+        try:
+            # Sent right away, so the response starts before the first change
+            yield "retry: 5000\n\n"
+            while True:
+                events = await client.next_events(timeout=LIVE_SCORES_KEEPALIVE_SECONDS)
+                if not events:
+                    yield ": keepalive\n\n"
+                for name, data in events.items():
+                    yield format_event(name=name, data=data)
+        finally:
+            self.unsubscribe(client)
+
+
+live_score_broadcaster = LiveScoreBroadcaster()
@@ -3,10 +3,11 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text, UniqueConstraint, Uuid
 from sqlalchemy.engine.default import DefaultExecutionContext
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.athlete.models import normalize_name
 from app.cf_games.constants import EVENT_NAMES
 from app.database.base import Base
 
@@ -50,6 +51,10 @@ def apply_tiebreak_ms(context: DefaultExecutionContext) -> str | None:
     return None
 
 
+def apply_judge_key(context: DefaultExecutionContext) -> str:
+    return normalize_name(context.get_current_parameters().get("judge_name"))
+
+
 def apply_total_score(context: DefaultExecutionContext) -> int:
     return (
         context.get_current_parameters().get("participation_score", 0)
@@ -61,7 +66,9 @@ def apply_total_score(context: DefaultExecutionContext) -> int:
     )
 
 
-class Score(Base):
+class ScoreColumns:
+    """Columns shared by the live score table and its staging copy."""
+
     # PK / FK
     athlete_id: Mapped[UUID] = mapped_column(ForeignKey("athlete.id"))
     ordinal: Mapped[int] = mapped_column(Integer)
@@ -96,13 +103,154 @@ class Score(Base):
     reps: Mapped[int | None] = mapped_column(Integer, nullable=True, default=apply_reps)
     time_ms: Mapped[str | None] = mapped_column(Integer, nullable=True, default=apply_time_ms)
     tiebreak_ms: Mapped[str | None] = mapped_column(Integer, nullable=True, default=apply_tiebreak_ms)
+    judge_key: Mapped[str | None] = mapped_column(String, nullable=True, index=True, default=apply_judge_key)
+
+    # Content hash of the CF score payload
+    fingerprint: Mapped[str | None] = mapped_column(String, nullable=True)
+
+
+class Score(ScoreColumns, Base):
+    __table_args__ = (UniqueConstraint("athlete_id", "ordinal"),)
 
     # Relationships
     athlete: Mapped[Athlete] = relationship(back_populates="scores")
 
 
+class ScoreStaging(ScoreColumns, Base):
+    """Refreshes build and score the next leaderboard here, then swap it into score in one transaction."""
+
+    __table_args__ = (UniqueConstraint("athlete_id", "ordinal"),)
+
+
+ScoreTable = type[Score] | type[ScoreStaging]
+
+
 class SideScore(Base):
+    # Scoring picks the latest side score per team, event and type. Renames filter by team
+    __table_args__ = (
+        Index(
+            "ix_side_score_team_name_event_name_score_type_created_at",
+            "team_name",
+            "event_name",
+            "score_type",
+            "created_at",
+        ),
+    )
+
     event_name: Mapped[str] = mapped_column(String)
     score_type: Mapped[str] = mapped_column(String)
     team_name: Mapped[str] = mapped_column(String)
     score: Mapped[int] = mapped_column(Integer)
+
+
+# Read models, rebuilt from score x athlete by rebuild_score_read_models. Rows are stored in display order.
+
+
+class TeamEventScore(Base):
+    __table_args__ = (UniqueConstraint("ordinal", "position"),)
+
+    ordinal: Mapped[int] = mapped_column(Integer)
+    position: Mapped[int] = mapped_column(Integer)
+    team_name: Mapped[str] = mapped_column(String)
+    count: Mapped[int] = mapped_column(Integer)
+    participation: Mapped[int] = mapped_column(Integer)
+    top3_score: Mapped[int] = mapped_column(Integer)
+    attendance_score: Mapped[int] = mapped_column(Integer)
+    judge_score: Mapped[int] = mapped_column(Integer)
+    appreciation_score: Mapped[int] = mapped_column(Integer)
+    side_challenge_score: Mapped[int] = mapped_column(Integer)
+    spirit_score: Mapped[int] = mapped_column(Integer)
+    total_score: Mapped[int] = mapped_column(Integer)
+
+
+class TeamTotalScore(Base):
+    __table_args__ = (UniqueConstraint("position"), Index("ix_team_total_score_overall_score", "overall_score"))
+
+    position: Mapped[int] = mapped_column(Integer)
+    team_name: Mapped[str] = mapped_column(String)
+    overall_score: Mapped[int] = mapped_column(Integer)
+
+
+class LeaderboardRow(Base):
+    __table_args__ = (UniqueConstraint("ordinal", "position"),)
+
+    ordinal: Mapped[int] = mapped_column(Integer)
+    position: Mapped[int] = mapped_column(Integer)
+    category: Mapped[str] = mapped_column(String)
+    name: Mapped[str] = mapped_column(String)
+    gender: Mapped[str] = mapped_column(String)
+    mf_age_category: Mapped[str] = mapped_column(String)
+    team_name: Mapped[str] = mapped_column(String)
+    affiliate_scaled: Mapped[str] = mapped_column(String)
+    affiliate_rank: Mapped[int] = mapped_column(Integer)
+    score_display: Mapped[str] = mapped_column(String)
+
+
+class AthleteScoreRow(Base):
+    __table_args__ = (
+        UniqueConstraint("ordinal", "position"),
+        # Category filtered pages seek to the category, then page on position
+        Index(
+            "ix_athlete_score_row_ordinal_gender_mf_age_category_position",
+            "ordinal",
+            "gender",
+            "mf_age_category",
+            "position",
+        ),
+    )
+
+    ordinal: Mapped[int] = mapped_column(Integer)
+    position: Mapped[int] = mapped_column(Integer)
+    category: Mapped[str] = mapped_column(String)
+    name: Mapped[str] = mapped_column(String)
+    gender: Mapped[str] = mapped_column(String)
+    mf_age_category: Mapped[str] = mapped_column(String)
+    team_name: Mapped[str] = mapped_column(String)
+    team_leader: Mapped[int] = mapped_column(Integer)
+    affiliate_scaled: Mapped[str] = mapped_column(String)
+    affiliate_rank: Mapped[int] = mapped_column(Integer)
+    score_display: Mapped[str] = mapped_column(String)
+    reps: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    time_ms: Mapped[str | None] = mapped_column(String, nullable=True)
+    tiebreak_ms: Mapped[str | None] = mapped_column(String, nullable=True)
+    judge_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    participation_score: Mapped[int] = mapped_column(Integer)
+    top3_score: Mapped[int] = mapped_column(Integer)
+    attendance_score: Mapped[int] = mapped_column(Integer)
+    judge_score: Mapped[int] = mapped_column(Integer)
+    appreciation_score: Mapped[int] = mapped_column(Integer)
+    side_challenge_score: Mapped[int] = mapped_column(Integer)
+    spirit_score: Mapped[int] = mapped_column(Integer)
+    total_score: Mapped[int] = mapped_column(Integer)
+    valid: Mapped[bool] = mapped_column(Boolean)
+
+
+# Score history, appended on each refresh swap. Rows are only written for scores whose rank or total changed since
+# their previous row, so a score's value at any generation is its latest row at or before it.
+
+
+class ScoreGeneration(Base):
+    """One row per refresh that changed a rank or total. created_at dates the generation."""
+
+    number: Mapped[int] = mapped_column(Integer, unique=True)
+
+
+class ScoreHistory(Base):
+    # A NULL rank and total mark a score dropped from the leaderboard
+    __table_args__ = (UniqueConstraint("athlete_id", "ordinal", "generation"),)
+
+    # No FK, history outlives athletes
+    athlete_id: Mapped[UUID] = mapped_column(Uuid)
+    ordinal: Mapped[int] = mapped_column(Integer)
+    generation: Mapped[int] = mapped_column(Integer)
+    affiliate_rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    total_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
+class TeamScoreHistory(Base):
+    __table_args__ = (UniqueConstraint("team_name", "generation"),)
+
+    team_name: Mapped[str] = mapped_column(String)
+    generation: Mapped[int] = mapped_column(Integer)
+    rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    overall_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
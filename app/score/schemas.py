@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import datetime as dt
+from uuid import UUID
+
 from app.schemas import CustomBaseModel
 
 
@@ -23,3 +26,47 @@ class ScoreExtendedModel(ScoreBaseModel):
 
 class ScoreEvents(CustomBaseModel):
     event_name: str
+
+
+class ScoreGenerationModel(CustomBaseModel):
+    number: int
+    created_at: dt.datetime
+
+
+class AthleteScoreTrendModel(CustomBaseModel):
+    generation: int
+    recorded_at: dt.datetime
+    ordinal: int
+    affiliate_rank: int | None
+    total_score: int | None
+    # Places moved up since the previous change, negative when down
+    rank_change: int | None
+
+
+class TeamScoreTrendModel(CustomBaseModel):
+    generation: int
+    recorded_at: dt.datetime
+    rank: int | None
+    overall_score: int | None
+    rank_change: int | None
+    score_change: int | None
+
+
+class AthleteScoreSnapshotModel(CustomBaseModel):
+    athlete_id: UUID
+    name: str | None
+    ordinal: int
+    affiliate_rank: int
+    total_score: int
+
+
+class TeamScoreSnapshotModel(CustomBaseModel):
+    team_name: str
+    rank: int
+    overall_score: int
+
+
+class ScoreGenerationSnapshotModel(CustomBaseModel):
+    generation: ScoreGenerationModel
+    teams: list[TeamScoreSnapshotModel]
+    scores: list[AthleteScoreSnapshotModel]
@@ -1,24 +1,58 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
+from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, and_, delete, func, insert, literal, null, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.athlete.models import Athlete
-from app.cf_games.constants import IGNORE_TEAMS
-from app.score.models import Score
+from app.athlete.models import Athlete, is_public_target
+from app.cf_games.constants import ATHLETE_SCORES_PAGE_SIZE, IGNORE_TEAMS, TEAM_LOGOS
+from app.database.base import Base
+from app.database.generation import bump_on_commit, data_generation
+from app.score.models import (
+    AthleteScoreRow,
+    LeaderboardRow,
+    Score,
+    ScoreGeneration,
+    ScoreHistory,
+    TeamEventScore,
+    TeamScoreHistory,
+    TeamTotalScore,
+)
+from app.score.schemas import (
+    AthleteScoreSnapshotModel,
+    AthleteScoreTrendModel,
+    ScoreGenerationModel,
+    ScoreGenerationSnapshotModel,
+    TeamScoreSnapshotModel,
+    TeamScoreTrendModel,
+)
 
 log = logging.getLogger("uvicorn.error")
 
 
-async def get_db_team_scores(
-    db_session: AsyncSession,
-    ordinal: int,
-) -> dict[str, dict[str, Any]]:
-    team_score_stmt = (
+# Read model rows get SQL-generated ids, so a rebuild is one INSERT ... SELECT per table
+READ_MODEL_ID = func.lower(func.hex(func.randomblob(16)))
+
+SCORE_DISPLAY_ORDER = [
+    Athlete.gender,
+    Athlete.mf_age_category.asc(),
+    Score.affiliate_scaled,
+    Score.scaled,
+    Score.score.desc(),
+    Score.rank.desc(),
+    Athlete.name,
+]
+
+
+def team_event_scores_stmt() -> Select:
+    return (
         select(
+            Score.ordinal,
+            func.row_number().over(partition_by=Score.ordinal, order_by=Athlete.team_name).label("position"),
             Athlete.team_name,
             func.count().label("count"),
             func.sum(Score.participation_score).label("participation"),
@@ -31,9 +65,118 @@ async def get_db_team_scores(
             func.sum(Score.total_score).label("total_score"),
         )
         .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .where((Score.ordinal == ordinal) & (Athlete.team_name.not_in(IGNORE_TEAMS)))
+        .where(is_public_target() & Athlete.team_name.not_in(IGNORE_TEAMS))
+        .group_by(Score.ordinal, Athlete.team_name)
+    )
+
+
+def team_total_scores_stmt() -> Select:
+    return (
+        select(
+            func.row_number().over(order_by=Athlete.team_name).label("position"),
+            Athlete.team_name,
+            func.sum(Score.total_score).label("overall_score"),
+        )
+        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
+        .where(is_public_target())
         .group_by(Athlete.team_name)
-        .order_by(Athlete.team_name)
+    )
+
+
+def leaderboard_stmt() -> Select:
+    return (
+        select(
+            Score.ordinal,
+            func.row_number().over(partition_by=Score.ordinal, order_by=SCORE_DISPLAY_ORDER).label("position"),
+            (Athlete.mf_age_category + "-" + Athlete.gender).label("category"),
+            Athlete.name,
+            Athlete.gender,
+            Athlete.mf_age_category,
+            Athlete.team_name,
+            Score.affiliate_scaled,
+            Score.affiliate_rank,
+            Score.score_display,
+        )
+        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
+        .where(is_public_target() & (Score.affiliate_rank <= 3))  # noqa: PLR2004
+    )
+
+
+def athlete_scores_stmt() -> Select:
+    return select(
+        Score.ordinal,
+        func.row_number().over(partition_by=Score.ordinal, order_by=SCORE_DISPLAY_ORDER).label("position"),
+        (Athlete.mf_age_category + "-" + Athlete.gender).label("category"),
+        Athlete.name,
+        Athlete.gender,
+        Athlete.mf_age_category,
+        Athlete.team_name,
+        Athlete.team_leader,
+        Score.affiliate_scaled,
+        Score.affiliate_rank,
+        Score.score_display,
+        Score.reps,
+        Score.time_ms,
+        Score.tiebreak_ms,
+        Score.judge_name,
+        Score.participation_score,
+        Score.top3_score,
+        Score.attendance_score,
+        Score.judge_score,
+        Score.appreciation_score,
+        Score.side_challenge_score,
+        Score.spirit_score,
+        Score.total_score,
+        Score.valid,
+    ).join_from(Score, Athlete, Score.athlete_id == Athlete.id).where(is_public_target())
+
+
+def athlete_scores_export_stmt() -> Select:
+    columns = [x for x in AthleteScoreRow.__table__.c if x.name not in ("id", "position", "created_at", "updated_at")]
+    return select(*columns).order_by(AthleteScoreRow.ordinal, AthleteScoreRow.position)
+
+
+async def rebuild_read_model(
+    db_session: AsyncSession,
+    model: type[Base],
+    stmt: Select,
+) -> None:
+    """Replace a read model's rows with the statement's rows."""
+    rows = stmt.subquery()
+    await db_session.execute(delete(model))
+    await db_session.execute(
+        insert(model).from_select(["id", *rows.c.keys()], select(READ_MODEL_ID, *rows.c)),
+    )
+
+
+async def rebuild_score_read_models(db_session: AsyncSession) -> None:
+    """Rebuild the public page read models from score. Callers commit, so readers see the swap atomically."""
+    bump_on_commit(db_session)
+    await rebuild_read_model(db_session, TeamEventScore, team_event_scores_stmt())
+    await rebuild_read_model(db_session, TeamTotalScore, team_total_scores_stmt())
+    await rebuild_read_model(db_session, LeaderboardRow, leaderboard_stmt())
+    await rebuild_read_model(db_session, AthleteScoreRow, athlete_scores_stmt())
+
+
+async def get_db_team_scores(
+    db_session: AsyncSession,
+    ordinal: int,
+) -> dict[str, dict[str, Any]]:
+    team_score_stmt = (
+        select(
+            TeamEventScore.team_name,
+            TeamEventScore.count,
+            TeamEventScore.participation,
+            TeamEventScore.top3_score,
+            TeamEventScore.attendance_score,
+            TeamEventScore.judge_score,
+            TeamEventScore.appreciation_score,
+            TeamEventScore.side_challenge_score,
+            TeamEventScore.spirit_score,
+            TeamEventScore.total_score,
+        )
+        .where(TeamEventScore.ordinal == ordinal)
+        .order_by(TeamEventScore.position)
     )
     ret = await db_session.execute(team_score_stmt)
 
@@ -48,14 +191,9 @@ async def get_db_team_scores(
 
 async def get_total_scores(db_session: AsyncSession) -> dict[str, dict[str, Any]]:
     total_score_stmt = (
-        select(
-            Athlete.team_name,
-            func.sum(Score.total_score).label("overall_score"),
-        )
-        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .where(Athlete.team_name.not_in(IGNORE_TEAMS))
-        .group_by(Athlete.team_name)
-        .order_by(Athlete.team_name)
+        select(TeamTotalScore.team_name, TeamTotalScore.overall_score)
+        .where(TeamTotalScore.team_name.not_in(IGNORE_TEAMS))
+        .order_by(TeamTotalScore.position)
     )
 
     ret = await db_session.execute(total_score_stmt)
@@ -75,109 +213,312 @@ async def get_leaderboard_scores(
 ) -> dict[str, dict[str, Any]]:
     stmt = (
         select(
-            Athlete.name,
-            Athlete.gender,
-            Athlete.mf_age_category,
-            Athlete.team_name,
-            Score.affiliate_scaled,
-            Score.affiliate_rank,
-            Score.score_display,
-        )
-        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .where((Score.ordinal == ordinal) & (Score.affiliate_rank <= 3))  # noqa: PLR2004
-        .order_by(
-            Athlete.gender,
-            Athlete.mf_age_category.asc(),
-            Score.affiliate_scaled,
-            Score.scaled,
-            Score.score.desc(),
-            Score.rank.desc(),
-            Athlete.name,
+            LeaderboardRow.category,
+            LeaderboardRow.name,
+            LeaderboardRow.gender,
+            LeaderboardRow.mf_age_category,
+            LeaderboardRow.team_name,
+            LeaderboardRow.affiliate_scaled,
+            LeaderboardRow.affiliate_rank,
+            LeaderboardRow.score_display,
         )
+        .where(LeaderboardRow.ordinal == ordinal)
+        .order_by(LeaderboardRow.position)
     )
     ret = await db_session.execute(stmt)
     result = ret.mappings().all()
     leaderboard = {}
     for row in result:
-        category = row.get("mf_age_category", "") + "-" + row.get("gender", "")
-        if category in leaderboard:
-            leaderboard[category].append(row)
-        else:
-            leaderboard[category] = [row]
+        leaderboard.setdefault(row["category"], []).append(row)
     return leaderboard
 
 
-async def get_all_athlete_scores(
+async def get_athlete_score_categories(
     db_session: AsyncSession,
     ordinal: int,
-) -> dict[str, dict[str, Any]]:
+) -> list[tuple[str, str]]:
+    """(gender, mf_age_category) pairs with a score row for the ordinal, in display order."""
+    stmt = (
+        select(AthleteScoreRow.gender, AthleteScoreRow.mf_age_category)
+        .where(AthleteScoreRow.ordinal == ordinal)
+        .group_by(AthleteScoreRow.gender, AthleteScoreRow.mf_age_category)
+        .order_by(AthleteScoreRow.gender, AthleteScoreRow.mf_age_category)
+    )
+    ret = await db_session.execute(stmt)
+    return [(row.gender, row.mf_age_category) for row in ret.all()]
+
+
+async def get_athlete_scores_page(  # noqa: PLR0913
+    db_session: AsyncSession,
+    ordinal: int,
+    gender: str | None = None,
+    mf_age_category: str | None = None,
+    after: int | None = None,
+    limit: int = ATHLETE_SCORES_PAGE_SIZE,
+) -> tuple[list[dict[str, Any]], str | None, int | None]:
+    """
+    One page of athlete score rows in display order, keyset paginated on position.
+
+    Returns the rows after the after cursor, the category of the row at the cursor, so the page knows whether it
+    starts a new category, and the cursor of the next page, None on the last one.
+    """
     stmt = (
         select(
-            Athlete.name,
-            Athlete.gender,
-            Athlete.mf_age_category,
-            Athlete.team_name,
-            Athlete.team_leader,
-            Score.affiliate_scaled,
-            Score.affiliate_rank,
-            Score.score_display,
-            Score.reps,
-            Score.time_ms,
-            Score.tiebreak_ms,
-            Score.judge_name,
-            Score.participation_score,
-            Score.top3_score,
-            Score.attendance_score,
-            Score.judge_score,
-            Score.appreciation_score,
-            Score.side_challenge_score,
-            Score.spirit_score,
-            Score.total_score,
-            Score.valid,
-        )
-        .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .where(Score.ordinal == ordinal)
-        .order_by(
-            Athlete.gender,
-            Athlete.mf_age_category.asc(),
-            Score.affiliate_scaled,
-            Score.scaled,
-            Score.score.desc(),
-            Score.rank.desc(),
-            Athlete.name,
+            AthleteScoreRow.position,
+            AthleteScoreRow.category,
+            AthleteScoreRow.name,
+            AthleteScoreRow.gender,
+            AthleteScoreRow.mf_age_category,
+            AthleteScoreRow.team_name,
+            AthleteScoreRow.team_leader,
+            AthleteScoreRow.affiliate_scaled,
+            AthleteScoreRow.affiliate_rank,
+            AthleteScoreRow.score_display,
+            AthleteScoreRow.reps,
+            AthleteScoreRow.time_ms,
+            AthleteScoreRow.tiebreak_ms,
+            AthleteScoreRow.judge_name,
+            AthleteScoreRow.participation_score,
+            AthleteScoreRow.top3_score,
+            AthleteScoreRow.attendance_score,
+            AthleteScoreRow.judge_score,
+            AthleteScoreRow.appreciation_score,
+            AthleteScoreRow.side_challenge_score,
+            AthleteScoreRow.spirit_score,
+            AthleteScoreRow.total_score,
+            AthleteScoreRow.valid,
         )
+        .where(AthleteScoreRow.ordinal == ordinal)
+        .order_by(AthleteScoreRow.position)
+        .limit(limit + 2)
     )
+    if gender:
+        stmt = stmt.where(AthleteScoreRow.gender == gender)
+    if mf_age_category:
+        stmt = stmt.where(AthleteScoreRow.mf_age_category == mf_age_category)
+    if after is not None:
+        stmt = stmt.where(AthleteScoreRow.position >= after)
     ret = await db_session.execute(stmt)
-    result = ret.mappings().all()
-    leaderboard = {}
-    for row in result:
-        category = row.get("mf_age_category", "") + "-" + row.get("gender", "")
-        if category in leaderboard:
-            leaderboard[category].append(row)
-        else:
-            leaderboard[category] = [row]
-    return leaderboard
+    rows = list(ret.mappings().all())
+    previous_category = None
+    if after is not None and rows and rows[0]["position"] == after:
+        previous_category = rows.pop(0)["category"]
+    next_after = rows[limit - 1]["position"] if len(rows) > limit else None
+    return rows[:limit], previous_category, next_after
 
 
 async def get_team_name_max_score(db_session: AsyncSession) -> list[str]:
-    total_score_stmt = (
-        select(
-            Athlete.team_name,
-            func.sum(Score.total_score).label("overall_score"),
-        )
+    max_score = select(func.max(TeamTotalScore.overall_score)).scalar_subquery()
+    stmt = (
+        select(TeamTotalScore.team_name)
+        .where(TeamTotalScore.overall_score == max_score)
+        .order_by(TeamTotalScore.position)
+    )
+    ret = await db_session.execute(stmt)
+    return list(ret.scalars())
+
+
+class LeadingTeams:
+    """Logos of the teams tied on the top overall score, for the page header. Recomputed once per data generation."""
+
+    def __init__(self) -> None:
+        self.generation: int | None = None
+        self.logos: list[str | None] = []
+        self.lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.generation != data_generation.value
+
+    async def refresh(self, db_session: AsyncSession) -> None:
+        async with self.lock:
+            if not self.stale:
+                return
+            generation = data_generation.value
+            team_names = await get_team_name_max_score(db_session=db_session)
+            self.logos = [TEAM_LOGOS.get(x) for x in team_names]
+            self.generation = generation
+
+
+leading_teams = LeadingTeams()
+
+
+HistoryTable = type[ScoreHistory] | type[TeamScoreHistory]
+
+SCORE_HISTORY_KEYS = ["athlete_id", "ordinal"]
+TEAM_HISTORY_KEYS = ["team_name"]
+
+
+def score_history_stmt() -> Select:
+    return (
+        select(Score.athlete_id, Score.ordinal, Score.affiliate_rank, Score.total_score)
         .join_from(Score, Athlete, Score.athlete_id == Athlete.id)
-        .group_by(Athlete.team_name)
-        .order_by(Athlete.team_name)
+        .where(is_public_target())
     )
 
-    ret = await db_session.execute(total_score_stmt)
-    result = ret.mappings().all()
 
-    teams = [row["team_name"] for row in result]
-    scores = [row["overall_score"] for row in result]
+def team_history_stmt() -> Select:
+    return select(
+        TeamTotalScore.team_name,
+        func.rank().over(order_by=TeamTotalScore.overall_score.desc()).label("rank"),
+        TeamTotalScore.overall_score,
+    ).where(TeamTotalScore.team_name.not_in(IGNORE_TEAMS))
+
+
+def latest_history_stmt(model: HistoryTable, keys: list[str], generation: int | None = None) -> Select:
+    """Each key's latest history row, as of generation when given."""
+    table = model.__table__
+    ranked = select(
+        *table.c,
+        func.row_number()
+        .over(partition_by=[table.c[x] for x in keys], order_by=table.c.generation.desc())
+        .label("latest"),
+    )
+    if generation is not None:
+        ranked = ranked.where(table.c.generation <= generation)
+    rows = ranked.subquery()
+    return select(*(x for x in rows.c if x.name != "latest")).where(rows.c.latest == 1)
+
+
+async def record_history_changes(
+    db_session: AsyncSession,
+    model: HistoryTable,
+    keys: list[str],
+    stmt: Select,
+    generation: int,
+) -> int:
+    """Append rows whose values differ from their latest history row, and NULL rows for keys no longer present."""
+    rows = stmt.subquery()
+    values = [x for x in rows.c.keys() if x not in keys]
+    latest = latest_history_stmt(model, keys).subquery()
+    same_key = and_(*(latest.c[x] == rows.c[x] for x in keys))
+    removed = (
+        select(READ_MODEL_ID, literal(generation), *(latest.c[x] for x in keys), *(null() for _ in values))
+        .where(or_(*(latest.c[x].is_not(None) for x in values)))
+        .where(~select(rows.c[keys[0]]).where(same_key).exists())
+    )
+    changed = (
+        select(READ_MODEL_ID, literal(generation), *rows.c)
+        .outerjoin_from(rows, latest, same_key)
+        .where(latest.c.generation.is_(None) | or_(*(latest.c[x].is_distinct_from(rows.c[x]) for x in values)))
+    )
+    count = 0
+    for history_stmt in (removed, changed):
+        result = await db_session.execute(
+            insert(model).from_select(["id", "generation", *keys, *values], history_stmt),
+        )
+        count += result.rowcount
+    return count
+
+
+async def record_score_history(db_session: AsyncSession) -> int | None:
+    """
+    Append the score ranks and team standings that changed to a new generation. Callers commit.
+
+    Returns the generation number, or None when nothing changed and no generation was recorded.
+    """
+    generation = await db_session.scalar(select(func.coalesce(func.max(ScoreGeneration.number), 0) + 1))
+    changes = await record_history_changes(
+        db_session=db_session,
+        model=ScoreHistory,
+        keys=SCORE_HISTORY_KEYS,
+        stmt=score_history_stmt(),
+        generation=generation,
+    )
+    changes += await record_history_changes(
+        db_session=db_session,
+        model=TeamScoreHistory,
+        keys=TEAM_HISTORY_KEYS,
+        stmt=team_history_stmt(),
+        generation=generation,
+    )
+    if not changes:
+        return None
+    db_session.add(ScoreGeneration(number=generation))
+    log.info("Recorded score generation %s with %s changes", generation, changes)
+    return generation
+
+
+async def get_score_generations(db_session: AsyncSession) -> list[ScoreGenerationModel]:
+    ret = await db_session.execute(select(ScoreGeneration).order_by(ScoreGeneration.number))
+    return [ScoreGenerationModel.model_validate(x) for x in ret.scalars()]
+
+
+async def get_score_generation_snapshot(
+    db_session: AsyncSession,
+    generation: int,
+) -> ScoreGenerationSnapshotModel | None:
+    """Rebuild the scores and team standings as they were after a past generation."""
+    score_generation = await ScoreGeneration.find(async_session=db_session, number=generation)
+    if not score_generation:
+        return None
 
-    if len(teams) == 0:
-        return []
+    teams = latest_history_stmt(TeamScoreHistory, TEAM_HISTORY_KEYS, generation).subquery()
+    team_stmt = select(teams).where(teams.c.rank.is_not(None)).order_by(teams.c.rank, teams.c.team_name)
+    scores = latest_history_stmt(ScoreHistory, SCORE_HISTORY_KEYS, generation).subquery()
+    score_stmt = (
+        select(scores, Athlete.name)
+        .outerjoin_from(scores, Athlete, scores.c.athlete_id == Athlete.id)
+        .where(scores.c.total_score.is_not(None))
+        .order_by(scores.c.ordinal, scores.c.affiliate_rank, Athlete.name)
+    )
+    team_ret = await db_session.execute(team_stmt)
+    score_ret = await db_session.execute(score_stmt)
+    return ScoreGenerationSnapshotModel(
+        generation=ScoreGenerationModel.model_validate(score_generation),
+        teams=[TeamScoreSnapshotModel.model_validate(x) for x in team_ret.mappings()],
+        scores=[AthleteScoreSnapshotModel.model_validate(x) for x in score_ret.mappings()],
+    )
 
-    max_score = max(scores)
-    return [team for team, score in zip(teams, scores, strict=True) if score == max_score]
+
+async def get_athlete_score_trend(
+    db_session: AsyncSession,
+    athlete_id: UUID,
+) -> list[AthleteScoreTrendModel]:
+    """Each change to an athlete's event ranks and totals, oldest first per event."""
+    previous_rank = func.lag(ScoreHistory.affiliate_rank).over(
+        partition_by=ScoreHistory.ordinal,
+        order_by=ScoreHistory.generation,
+    )
+    stmt = (
+        select(
+            ScoreHistory.generation,
+            ScoreGeneration.created_at.label("recorded_at"),
+            ScoreHistory.ordinal,
+            ScoreHistory.affiliate_rank,
+            ScoreHistory.total_score,
+            (previous_rank - ScoreHistory.affiliate_rank).label("rank_change"),
+        )
+        .join_from(ScoreHistory, ScoreGeneration, ScoreGeneration.number == ScoreHistory.generation)
+        .where(ScoreHistory.athlete_id == athlete_id)
+        .order_by(ScoreHistory.ordinal, ScoreHistory.generation)
+    )
+    ret = await db_session.execute(stmt)
+    return [AthleteScoreTrendModel.model_validate(x) for x in ret.mappings()]
+
+
+async def get_team_score_trend(
+    db_session: AsyncSession,
+    team_name: str,
+) -> list[TeamScoreTrendModel]:
+    """Each change to a team's standing, oldest first."""
+    stmt = (
+        select(
+            TeamScoreHistory.generation,
+            ScoreGeneration.created_at.label("recorded_at"),
+            TeamScoreHistory.rank,
+            TeamScoreHistory.overall_score,
+            (func.lag(TeamScoreHistory.rank).over(order_by=TeamScoreHistory.generation) - TeamScoreHistory.rank).label(
+                "rank_change",
+            ),
+            (
+                TeamScoreHistory.overall_score
+                - func.lag(TeamScoreHistory.overall_score).over(order_by=TeamScoreHistory.generation)
+            ).label("score_change"),
+        )
+        .join_from(TeamScoreHistory, ScoreGeneration, ScoreGeneration.number == TeamScoreHistory.generation)
+        .where(TeamScoreHistory.team_name == team_name)
+        .order_by(TeamScoreHistory.generation)
+    )
+    ret = await db_session.execute(stmt)
+    return [TeamScoreTrendModel.model_validate(x) for x in ret.mappings()]
@@ -1,23 +1,40 @@
 import logging
 from typing import Annotated
+from urllib.parse import urlencode
 from uuid import UUID
 
 from fastapi import APIRouter, Form, Request, Response, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy import select
 
 from app.athlete.service import get_team_names
-from app.cf_games.constants import DEFAULT_SIDE_SCORE, EVENT_NAMES, TEAM_LOGOS
+from app.cf_games.constants import DEFAULT_SIDE_SCORE, EVENT_NAMES
+from app.cf_games.service import recompute_team_event_scores
 from app.database.dependencies import db_dependency
+from app.database.generation import data_generation
 from app.exceptions import not_found_exception
+from app.score.live import leaderboard_topic, live_score_broadcaster, team_scores_topic
 from app.score.models import SideScore
+from app.score.schemas import (
+    AthleteScoreTrendModel,
+    ScoreGenerationModel,
+    ScoreGenerationSnapshotModel,
+    TeamScoreTrendModel,
+)
 from app.score.service import (
-    get_all_athlete_scores,
+    athlete_scores_export_stmt,
+    get_athlete_score_categories,
+    get_athlete_score_trend,
+    get_athlete_scores_page,
     get_db_team_scores,
     get_leaderboard_scores,
-    get_team_name_max_score,
+    get_score_generation_snapshot,
+    get_score_generations,
+    get_team_score_trend,
     get_total_scores,
 )
+from app.ui.cache import cached_fragment
+from app.ui.export import ExportFormat, export_response
 from app.ui.template import templates
 
 log = logging.getLogger("uvicorn.error")
@@ -28,6 +45,7 @@ score_router = APIRouter()
 
 
 @score_router.get("/team_scores/{ordinal}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@cached_fragment
 async def get_team_scores_ordinal(
     ordinal: int,
     request: Request,
@@ -44,11 +62,14 @@ async def get_team_scores_ordinal(
             "scores": scores,
             "overall_score": overall_score,
             "event_name": EVENT_NAMES.get(ordinal),
+            "ordinal": ordinal,
+            "generation": data_generation.value,
         },
     )
 
 
 @score_router.get("/leaderboard/{ordinal}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@cached_fragment
 async def get_leaderboard_ordinal(
     ordinal: int,
     request: Request,
@@ -63,29 +84,117 @@ async def get_leaderboard_ordinal(
         context={
             "leaderboard": leaderboard,
             "event_name": EVENT_NAMES.get(ordinal),
+            "ordinal": ordinal,
+            "generation": data_generation.value,
         },
     )
 
 
+def live_scores_response(topic: str, generation: int | None) -> StreamingResponse:
+    client = live_score_broadcaster.subscribe(topic=topic, generation=generation)
+    return StreamingResponse(
+        live_score_broadcaster.stream(client=client),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # GZipMiddleware leaves responses with an encoding alone, it would otherwise buffer the stream
+            "Content-Encoding": "identity",
+        },
+    )
+
+
+@score_router.get("/live/team_scores/{ordinal}", status_code=status.HTTP_200_OK)
+async def get_live_team_scores(
+    ordinal: int,
+    generation: int | None = None,
+) -> StreamingResponse:
+    if ordinal not in EVENT_NAMES:
+        raise not_found_exception()
+    return live_scores_response(topic=team_scores_topic(ordinal), generation=generation)
+
+
+@score_router.get("/live/leaderboard/{ordinal}", status_code=status.HTTP_200_OK)
+async def get_live_leaderboard(
+    ordinal: int,
+    generation: int | None = None,
+) -> StreamingResponse:
+    if ordinal not in EVENT_NAMES:
+        raise not_found_exception()
+    return live_scores_response(topic=leaderboard_topic(ordinal), generation=generation)
+
+
+def athlete_scores_filters(gender: str | None, mf_age_category: str | None) -> dict[str, str]:
+    return {k: v for k, v in {"gender": gender, "mf_age_category": mf_age_category}.items() if v}
+
+
 @score_router.get("/athlete_scores/{ordinal}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@cached_fragment
 async def get_athlete_scores(
     ordinal: int,
     request: Request,
     db_session: db_dependency,
+    gender: str | None = None,
+    mf_age_category: str | None = None,
 ) -> Response:
     if ordinal not in EVENT_NAMES:
         raise not_found_exception()
-    scores = await get_all_athlete_scores(db_session=db_session, ordinal=ordinal)
+    categories = await get_athlete_score_categories(db_session=db_session, ordinal=ordinal)
+    filters = athlete_scores_filters(gender=gender, mf_age_category=mf_age_category)
+    scores, _, next_after = await get_athlete_scores_page(db_session=db_session, ordinal=ordinal, **filters)
     return templates.TemplateResponse(
         request=request,
         name="pages/athlete_scores.jinja2",
         context={
             "scores": scores,
+            "previous_category": None,
+            "next_query": urlencode({**filters, "after": next_after}) if next_after else None,
+            "genders": sorted({x[0] for x in categories}),
+            "mf_age_categories": sorted({x[1] for x in categories}),
+            "gender": gender,
+            "mf_age_category": mf_age_category,
+            "ordinal": ordinal,
             "event_name": EVENT_NAMES.get(ordinal),
         },
     )
 
 
+@score_router.get("/athlete_scores/{ordinal}/rows", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
+@cached_fragment
+async def get_athlete_scores_rows(  # noqa: PLR0913
+    ordinal: int,
+    request: Request,
+    db_session: db_dependency,
+    gender: str | None = None,
+    mf_age_category: str | None = None,
+    after: int | None = None,
+) -> Response:
+    if ordinal not in EVENT_NAMES:
+        raise not_found_exception()
+    filters = athlete_scores_filters(gender=gender, mf_age_category=mf_age_category)
+    scores, previous_category, next_after = await get_athlete_scores_page(
+        db_session=db_session,
+        ordinal=ordinal,
+        after=after,
+        **filters,
+    )
+    return templates.TemplateResponse(
+        request=request,
+        name="partials/athlete_scores_rows.jinja2",
+        context={
+            "scores": scores,
+            "previous_category": previous_category,
+            "next_query": urlencode({**filters, "after": next_after}) if next_after else None,
+            "ordinal": ordinal,
+        },
+    )
+
+
+@score_router.get("/athlete_scores/export/{export_format}", status_code=status.HTTP_200_OK)
+async def get_athlete_scores_export(export_format: ExportFormat) -> StreamingResponse:
+    return export_response(stmt=athlete_scores_export_stmt(), export_format=export_format, name="athlete_scores")
+
+
 @score_router.get("/side_scores", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_side_scores_page(
     request: Request,
@@ -115,6 +224,11 @@ async def delete_side_score_id(
     side_score = await SideScore.get(async_session=db_session, id_=id_)
     if side_score:
         await side_score.delete(async_session=db_session)
+        await recompute_team_event_scores(
+            db_session=db_session,
+            team_name=side_score.team_name,
+            event_name=side_score.event_name,
+        )
 
     teams = await get_team_names(db_session=db_session)
     side_score_stmt = select(SideScore).order_by(SideScore.event_name, SideScore.score_type)
@@ -147,6 +261,7 @@ async def post_side_score_new(  # noqa: PLR0913
         side_score = SideScore(event_name=event_name, score_type=score_type, team_name=team_name, score=score)
         db_session.add(side_score)
         await db_session.commit()
+        await recompute_team_event_scores(db_session=db_session, team_name=team_name, event_name=event_name)
 
     side_score_stmt = select(SideScore).order_by(SideScore.event_name, SideScore.score_type)
     result = await db_session.execute(side_score_stmt)
@@ -163,18 +278,35 @@ async def post_side_score_new(  # noqa: PLR0913
     )
 
 
-@score_router.get("/leading_teams_imgs", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
-async def get_leading_teams_imgs(
-    request: Request,
-    db_sesion: db_dependency,
-) -> Response:
-    leading_teams = await get_team_name_max_score(db_session=db_sesion)
-    leading_teams_logos = [TEAM_LOGOS.get(x) for x in leading_teams]
+@score_router.get("/score_history/generations")
+async def get_score_history_generations(
+    db_session: db_dependency,
+) -> list[ScoreGenerationModel]:
+    return await get_score_generations(db_session=db_session)
 
-    return templates.TemplateResponse(
-        request=request,
-        name="partials/leading_teams.jinja2",
-        context={
-            "leading_logos": leading_teams_logos,
-        },
-    )
+
+@score_router.get("/score_history/generations/{generation}")
+async def get_score_history_generation(
+    generation: int,
+    db_session: db_dependency,
+) -> ScoreGenerationSnapshotModel:
+    snapshot = await get_score_generation_snapshot(db_session=db_session, generation=generation)
+    if not snapshot:
+        raise not_found_exception()
+    return snapshot
+
+
+@score_router.get("/score_history/athletes/{athlete_id}")
+async def get_score_history_athlete(
+    athlete_id: UUID,
+    db_session: db_dependency,
+) -> list[AthleteScoreTrendModel]:
+    return await get_athlete_score_trend(db_session=db_session, athlete_id=athlete_id)
+
+
+@score_router.get("/score_history/teams/{team_name}")
+async def get_score_history_team(
+    team_name: str,
+    db_session: db_dependency,
+) -> list[TeamScoreTrendModel]:
+    return await get_team_score_trend(db_session=db_session, team_name=team_name)
@@ -18,5 +18,14 @@ class AuthSettings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_prefix="auth_", extra="ignore")
 
 
+class TemplateSettings(BaseSettings):
+    # Production: compiled templates cached on disk, never checked for changes, all compiled at startup
+    production: bool = False
+    bytecode_cache_directory: str = "cache/jinja"
+
+    model_config = SettingsConfigDict(env_file=".env", env_prefix="templates_", extra="ignore")
+
+
 db_settings = DBSettings()
 auth_settings = AuthSettings()
+template_settings = TemplateSettings()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import HTMLResponse
+
+from app.cf_games.constants import FRAGMENT_CACHE_MAX_ENTRIES, PAGE_PROXY_CACHE_SECONDS
+from app.database.generation import data_generation
+
+log = logging.getLogger("uvicorn.error")
+
+FragmentKey = tuple[str, str, int, bool, bool]
+
+
+class FragmentCache:
+    """
+    Rendered HTML of public pages, keyed by route, query, data generation, htmx and admin.
+
+    Concurrent misses on one key share a single render. Entries of older generations are unreachable and get dropped
+    as new ones are stored.
+    """
+
+    def __init__(self, max_entries: int = FRAGMENT_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[FragmentKey, bytes] = OrderedDict()
+        self.pending: dict[FragmentKey, asyncio.Future[bytes]] = {}
+
+    @staticmethod
+    def key(request: Request) -> FragmentKey:
+        return (
+            request.url.path,
+            str(request.query_params),
+            data_generation.value,
+            "HX-Request" in request.headers,
+            "rjtc_admin" in request.headers,
+        )
+
+    async def get_or_render(self, key: FragmentKey, render: Callable[[], Awaitable[Response]]) -> Response:
+        body = self.entries.get(key)
+        if body is not None:
+            self.entries.move_to_end(key)
+            return HTMLResponse(body)
+        pending = self.pending.get(key)
+        if pending is not None:
+            await asyncio.wait([pending])
+            # A cancelled render leaves this request to render for itself
+            if not pending.cancelled():
+                return HTMLResponse(pending.result())
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            response = await render()
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it here too, a miss nobody joined would otherwise log it as never retrieved
+            future.exception()
+            raise
+        else:
+            if response.status_code == status.HTTP_200_OK and isinstance(response, HTMLResponse):
+                self.store(key, bytes(response.body))
+            future.set_result(bytes(response.body))
+            return response
+        finally:
+            future.cancel()
+            del self.pending[key]
+
+    def store(self, key: FragmentKey, body: bytes) -> None:
+        generation = key[2]
+        for stale in [x for x in self.entries if x[2] != generation]:
+            del self.entries[stale]
+        self.entries[key] = body
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+def validator_headers(key: FragmentKey) -> dict[str, str]:
+    """
+    ETag and Last-Modified from the data generation the page was rendered at, and the caching policy.
+
+    Browsers always revalidate. X-Accel-Expires lets nginx micro-cache public pages and is not passed on to clients.
+    Admin pages are private.
+    """
+    _, _, generation, htmx, admin = key
+    headers = {"ETag": f'W/"{generation}-{int(htmx)}{int(admin)}"', "Vary": "HX-Request, Cookie"}
+    if data_generation.value == generation and data_generation.modified_at:
+        headers["Last-Modified"] = format_datetime(data_generation.modified_at, usegmt=True)
+    if admin:
+        headers["Cache-Control"] = "private, no-cache"
+    else:
+        headers["Cache-Control"] = "public, no-cache"
+        headers["X-Accel-Expires"] = str(PAGE_PROXY_CACHE_SECONDS)
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins over If-Modified-Since. ETags compare weakly."""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        etags = [x.strip().removeprefix("W/") for x in if_none_match.split(",")]
+        return "*" in etags or headers["ETag"].removeprefix("W/") in etags
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+def cached_fragment(view: Callable[..., Awaitable[Response]]) -> Callable[..., Awaitable[Response]]:
+    """
+    Serve a public page view from fragment_cache, with validators. The view must take a request argument.
+
+    A request whose validators still match gets a 304 before the view runs, so without a query or a render.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(*args: Any, **kwargs: Any) -> Response:  # noqa: ANN401
+        key = fragment_cache.key(kwargs["request"])
+        headers = validator_headers(key)
+        if is_not_modified(kwargs["request"], headers):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response = await fragment_cache.get_or_render(key, lambda: view(*args, **kwargs))
+        response.headers.update(headers)
+        return response
+
+    # Resolved here, FastAPI would look postponed annotations up in this module's globals
+    wrapper.__signature__ = inspect.signature(view, eval_str=True)  # type: ignore[attr-defined]
+    return wrapper
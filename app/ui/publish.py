@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gzip
+import logging
+import os
+from pathlib import Path
+from uuid import uuid4
+
+import aiofiles
+import httpx
+from starlette.types import ASGIApp
+
+from app.cf_games.constants import EVENT_NAMES, STATIC_SITE_DIRECTORY
+from app.database.generation import data_generation
+
+log = logging.getLogger("uvicorn.error")
+
+
+def public_page_paths() -> list[str]:
+    paths = ["/"]
+    for ordinal in EVENT_NAMES:
+        paths += [f"/team_scores/{ordinal}", f"/leaderboard/{ordinal}", f"/athlete_scores/{ordinal}"]
+    return [*paths, "/team_members", "/side_scores"]
+
+
+class StaticSitePublisher:
+    """
+    Renders every public page through the app, as an anonymous visitor, into a directory nginx serves directly.
+
+    Each page is written as <path>.html (index.html for /) next to a gzip sidecar for gzip_static. Files are replaced
+    atomically, so nginx never serves a half written page. Once started, it republishes whenever the data generation
+    moves, i.e. after every refresh swap and admin edit of the public data.
+    """
+
+    def __init__(self, directory: str = STATIC_SITE_DIRECTORY) -> None:
+        self.directory = Path(directory)
+        self.app: ASGIApp | None = None
+        self.generation: int | None = None
+        self.lock = asyncio.Lock()
+        self.task: asyncio.Task | None = None
+
+    def open(self, app: ASGIApp) -> None:
+        self.app = app
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    async def _run(self) -> None:
+        generation = data_generation.value
+        while True:
+            # A failed publish leaves the previous static pages up until the next change
+            try:
+                await self.publish()
+            except Exception:
+                log.exception("Static site publish failed at generation %s", generation)
+            generation = await data_generation.wait_past(generation)
+
+    def path(self, page_path: str) -> Path:
+        return self.directory / f"{page_path.strip('/') or 'index'}.html"
+
+    async def write(self, path: Path, body: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The sidecar goes first, so nginx never pairs a new page with an old .gz
+        for target, content in ((path.with_name(f"{path.name}.gz"), gzip.compress(body, mtime=0)), (path, body)):
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.{uuid4().hex}.tmp")
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(content)
+            os.replace(tmp_path, target)  # noqa: PTH105
+
+    async def publish(self, *, force: bool = False) -> int:
+        """Render and write all public pages, unless they are already at the current data generation."""
+        if self.app is None:
+            log.warning("Static site publisher has no app to render with")
+            return 0
+
+        async with self.lock:
+            generation = data_generation.value
+            if generation == self.generation and not force:
+                return 0
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://publish") as client:
+                for page_path in public_page_paths():
+                    response = await client.get(page_path)
+                    response.raise_for_status()
+                    await self.write(self.path(page_path), response.content)
+            self.generation = generation
+        log.info("Published %s static pages at generation %s", len(public_page_paths()), generation)
+        return len(public_page_paths())
+
+
+static_site_publisher = StaticSitePublisher()
@@ -1,16 +1,60 @@
+import logging
+from pathlib import Path
 from typing import Any
 
 import jinja_partials
 from fastapi import Request
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
 from app.cf_games.constants import RENDER_CONTEXT, TEAM_INSTA, TEAM_LOGOS
+from app.score.service import leading_teams
+from app.settings import template_settings
+
+log = logging.getLogger("uvicorn.error")
+
+TEMPLATE_DIRECTORY = "templates"
 
 
 def get_render_context(_: Request) -> dict[str, Any]:
-    return {"info": RENDER_CONTEXT, "team_logos": TEAM_LOGOS, "team_insta": TEAM_INSTA}
+    return {
+        "info": RENDER_CONTEXT,
+        "team_logos": TEAM_LOGOS,
+        "team_insta": TEAM_INSTA,
+        "leading_logos": leading_teams.logos,
+    }
+
+
+def create_templates(*, production: bool, bytecode_cache_directory: str) -> Jinja2Templates:
+    """
+    Development templates are re-read when their file changes. Production ones are compiled once per deploy: the
+    bytecode lands in bytecode_cache_directory for later processes, and renders never stat the template files.
+    """
+    bytecode_cache = None
+    if production:
+        Path(bytecode_cache_directory).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(bytecode_cache_directory)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIRECTORY),
+        autoescape=True,
+        auto_reload=not production,
+        bytecode_cache=bytecode_cache,
+    )
+    jinja_templates = Jinja2Templates(env=env, context_processors=[get_render_context])
+    jinja_partials.register_starlette_extensions(templates=jinja_templates)
+    return jinja_templates
+
 
+def precompile_templates(jinja_templates: Jinja2Templates) -> int:
+    """Load every page and partial, so no request pays for parsing one."""
+    names = jinja_templates.env.list_templates(extensions=["jinja2"])
+    for name in names:
+        jinja_templates.get_template(name)
+    log.info("Compiled %s templates", len(names))
+    return len(names)
 
-templates = Jinja2Templates(directory="templates", context_processors=[get_render_context])
 
-jinja_partials.register_starlette_extensions(templates=templates)
+templates = create_templates(
+    production=template_settings.production,
+    bytecode_cache_directory=template_settings.bytecode_cache_directory,
+)
@@ -0,0 +1,46 @@
+"""Synthetic CF leaderboard rows shaped like the real API payload, for benchmarks."""
+
+import random
+
+FIRST_NAMES = ["anna", "bob", "chen", "dana", "eli", "fay", "gus", "hana", "ivo", "jun", "kai", "lea"]
+LAST_NAMES = ["smith", "jones", "lee", "khan", "patel", "rossi", "novak", "silva"]
+DIVISIONS = ["1", "2", "7", "8"]
+
+
+def make_leaderboard_rows(n: int = 1000, seed: int = 1, ordinals: tuple[int, ...] = (1, 2, 3)) -> list[dict]:
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        first_name = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last_name = f"{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}{i}"
+        division = rnd.choice(DIVISIONS)
+        entrant = {
+            "competitorId": str(1000 + i),
+            "competitorName": f"{first_name} {last_name}",
+            "firstName": first_name,
+            "lastName": last_name,
+            "gender": "M" if division in ("1", "7") else "F",
+            "divisionId": division,
+            "affiliateId": "31316",
+            "affiliateName": "Crossfit MonkeyFlag",
+            "age": str(rnd.randint(16, 70)),
+        }
+        scores = []
+        for ordinal in ordinals:
+            reps = rnd.randint(0, 300)
+            scores.append(
+                {
+                    "ordinal": ordinal,
+                    "rank": str(rnd.randint(1, 99999)),
+                    "score": str(reps * 10),
+                    "valid": "1",
+                    "scoreDisplay": f"{reps} reps",
+                    "scaled": str(rnd.choice([0, 1])),
+                    "breakdown": f"{reps} reps\nTiebreak: 5:{rnd.randint(10, 59)}",
+                    "time": "",
+                    "judge": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}",
+                    "affiliate": "Crossfit MonkeyFlag",
+                },
+            )
+        rows.append({"entrant": entrant, "scores": scores})
+    return rows
@@ -0,0 +1,134 @@
+"""
+Compare the SQL and NumPy scoring engines on a throwaway SQLite database at several leaderboard sizes.
+
+uv run --extra numpy python -m scripts.bench_scoring
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import case, func, insert, select, update
+
+from app.appreciation.models import Appreciation
+from app.athlete.models import Athlete
+from app.attendance.models import Attendance
+from app.cf_games.constants import AFFILIATE_ID, EVENT_NAMES, TEAM_LOGOS, YEAR
+from app.cf_games.service import (
+    StageTimer,
+    apply_scoring_pipeline,
+    ingest_cf_data_bulk,
+    reset_affiliate_scores,
+    validate_cf_page,
+)
+from app.database.base import Base
+from app.database.engine import SessionManager
+from app.score.models import Score, SideScore
+from scripts.bench_data import make_leaderboard_rows
+
+SCORE_COUNTS = [1_000, 10_000, 100_000]
+ORDINALS = (1, 2, 3)
+TEAMS = [*TEAM_LOGOS, "zz"]
+ROW_ID = func.lower(func.hex(func.randomblob(16)))
+SCORE_COMPONENTS = [
+    Score.affiliate_rank,
+    Score.top3_score,
+    Score.attendance_score,
+    Score.judge_score,
+    Score.appreciation_score,
+    Score.side_challenge_score,
+    Score.spirit_score,
+    Score.total_score,
+]
+
+
+async def seed(session_manager: SessionManager, score_count: int) -> None:
+    rnd = random.Random(score_count)
+    rows = make_leaderboard_rows(score_count // len(ORDINALS), ordinals=ORDINALS)
+    # Half the scores are judged by another entrant, so judge points have matches
+    for row in rows:
+        for score in row["scores"]:
+            if rnd.random() < 0.5:  # noqa: PLR2004
+                score["judge"] = rnd.choice(rows)["entrant"]["competitorName"].upper()
+
+    async with session_manager.connect() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_manager.session() as db_session:
+        valid_rows, quarantined = validate_cf_page([x["entrant"] for x in rows], [x["scores"] for x in rows])
+        await ingest_cf_data_bulk(
+            db_session=db_session,
+            year=YEAR,
+            affiliate_id=AFFILIATE_ID,
+            rows=valid_rows,
+            quarantined=quarantined,
+        )
+        await db_session.execute(
+            update(Athlete).values(
+                team_name=case(
+                    *((Athlete.competitor_id % len(TEAMS) == i, team) for i, team in enumerate(TEAMS)),
+                ),
+                team_leader=case((Athlete.competitor_id % 11 == 0, 2), (Athlete.competitor_id % 13 == 0, 1), else_=0),
+            ),
+        )
+        attendance_columns = [ROW_ID, Score.athlete_id, Score.ordinal, Score.event_name]
+        await db_session.execute(
+            insert(Attendance).from_select(
+                ["id", "athlete_id", "ordinal", "event_name"],
+                select(*attendance_columns).where(Score.score % 3 == 0),
+            ),
+        )
+        await db_session.execute(
+            insert(Appreciation).from_select(
+                ["id", "athlete_id", "ordinal", "event_name", "score"],
+                select(*attendance_columns, Score.rank % 2 * 5 + 5).where(Score.rank % 17 == 0),
+            ),
+        )
+        for event_name in EVENT_NAMES.values():
+            for team_name in TEAM_LOGOS:
+                for score_type in ("side_challenge", "spirit"):
+                    db_session.add(
+                        SideScore(
+                            event_name=event_name,
+                            team_name=team_name,
+                            score_type=score_type,
+                            score=rnd.choice([10, 25, 50]),
+                        ),
+                    )
+        await db_session.commit()
+
+
+async def score(session_manager: SessionManager, engine: str) -> tuple[float, list[tuple]]:
+    async with session_manager.session() as db_session:
+        # Start each engine from unscored rows, so both do a full write
+        await reset_affiliate_scores(db_session=db_session)
+        await db_session.execute(update(Score).values(total_score=0))
+        await db_session.commit()
+        start = time.perf_counter()
+        await apply_scoring_pipeline(db_session=db_session, engine=engine, stages=StageTimer())
+        seconds = time.perf_counter() - start
+        result = await db_session.execute(select(Score.id, *SCORE_COMPONENTS).order_by(Score.id))
+        return seconds, [tuple(x) for x in result]
+
+
+async def bench(score_count: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        session_manager = SessionManager(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        await seed(session_manager, score_count)
+        sql_seconds, sql_scores = await score(session_manager, "sql")
+        numpy_seconds, numpy_scores = await score(session_manager, "numpy")
+        await session_manager.close()
+    print(  # noqa: T201
+        f"{len(sql_scores):>7} scores: sql {sql_seconds * 1000:8.1f} ms  numpy {numpy_seconds * 1000:8.1f} ms  "
+        f"speedup {sql_seconds / numpy_seconds:5.1f}x  same scores {sql_scores == numpy_scores}",
+    )
+
+
+async def main() -> None:
+    for score_count in SCORE_COUNTS:
+        await bench(score_count)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Cold and warm render times of the athlete and team score pages, with the development and production template
+profiles. Cold is the first render from a fresh environment, as in a new worker process: development parses and
+compiles the templates, production loads them from a filled bytecode cache. Warm is the steady state after it.
+
+uv run python -m scripts.bench_templates
+"""
+
+import tempfile
+import time
+import timeit
+
+from starlette.requests import Request
+
+from app.cf_games.constants import ATHLETE_SCORES_PAGE_SIZE, EVENT_NAMES, TEAM_LOGOS
+from app.ui.template import create_templates, get_render_context, precompile_templates
+
+REPEAT = 200
+COLD_REPEAT = 5
+
+TEAM_SCORE_FIELDS = [
+    "count",
+    "participation",
+    "top3_score",
+    "attendance_score",
+    "judge_score",
+    "appreciation_score",
+    "side_challenge_score",
+    "spirit_score",
+    "total_score",
+]
+
+
+def make_context() -> dict[str, dict]:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    base = {"request": request, **get_render_context(request), "ordinal": 1, "generation": 1}
+    athletes = [
+        {
+            "category": "1. Open-F" if i < ATHLETE_SCORES_PAGE_SIZE // 2 else "1. Open-M",
+            "name": f"athlete {i}",
+            "team_name": "1. Toes Too Far",
+            "team_leader": i % 3,
+            "affiliate_scaled": "RX",
+            "affiliate_rank": i + 1,
+            "score_display": f"{200 - i} reps",
+            "reps": 200 - i,
+            "time_ms": None,
+            "tiebreak_ms": "5:24",
+            "judge_name": "judge",
+            "valid": True,
+            **{x: i for x in TEAM_SCORE_FIELDS[1:]},
+        }
+        for i in range(ATHLETE_SCORES_PAGE_SIZE)
+    ]
+    teams = {x: {"team_name": x, **{y: i for y in TEAM_SCORE_FIELDS}} for i, x in enumerate(TEAM_LOGOS)}
+    return {
+        "pages/athlete_scores.jinja2": {
+            **base,
+            "scores": athletes,
+            "previous_category": None,
+            "next_query": "after=50",
+            "genders": ["F", "M"],
+            "mf_age_categories": ["1. Open", "2. Masters"],
+            "event_name": EVENT_NAMES[1],
+        },
+        "pages/team_scores.jinja2": {
+            **base,
+            "scores": teams,
+            "overall_score": {x: {"overall_score": y["total_score"]} for x, y in teams.items()},
+            "event_name": EVENT_NAMES[1],
+        },
+    }
+
+
+def cold_render(name: str, context: dict, *, production: bool, bytecode_cache_directory: str) -> float:
+    started = time.perf_counter()
+    jinja_templates = create_templates(production=production, bytecode_cache_directory=bytecode_cache_directory)
+    jinja_templates.get_template(name).render(context)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    contexts = make_context()
+    with tempfile.TemporaryDirectory() as directory:
+        # Fill the bytecode cache, as the first production process after a deploy does
+        precompile_templates(create_templates(production=True, bytecode_cache_directory=directory))
+
+        for name, context in contexts.items():
+            print(name)  # noqa: T201
+            for profile, production in [("development", False), ("production", True)]:
+                cold = min(
+                    cold_render(name, context, production=production, bytecode_cache_directory=directory)
+                    for _ in range(COLD_REPEAT)
+                )
+                jinja_templates = create_templates(production=production, bytecode_cache_directory=directory)
+                jinja_templates.get_template(name).render(context)
+                warm = min(
+                    timeit.repeat(
+                        lambda t=jinja_templates: t.get_template(name).render(context),
+                        number=1,
+                        repeat=REPEAT,
+                    ),
+                )
+                print(f"  {profile:>11}: cold {cold * 1000:7.2f} ms  warm {warm * 1000:7.3f} ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare per-row model_validate against batched TypeAdapter validation of CF leaderboard pages.
+
+uv run python -m scripts.bench_validation
+"""
+
+import timeit
+from itertools import batched
+
+from app.cf_games.constants import CF_API_PAGE_SIZE
+from app.cf_games.schemas import CFEntrantInputModel, CFScoreInputModel
+from app.cf_games.service import validate_cf_page
+from scripts.bench_data import make_leaderboard_rows
+
+ROW_COUNT = 5000
+REPEAT = 5
+
+
+def validate_rowwise(pages: list[tuple[dict, ...]]) -> None:
+    for page in pages:
+        for row in page:
+            CFEntrantInputModel.model_validate(row["entrant"])
+            for score in row["scores"]:
+                CFScoreInputModel.model_validate(score)
+
+
+def validate_batched(pages: list[tuple[dict, ...]]) -> None:
+    for page in pages:
+        validate_cf_page([x["entrant"] for x in page], [x["scores"] for x in page])
+
+
+def main() -> None:
+    rows = make_leaderboard_rows(ROW_COUNT)
+    pages = list(batched(rows, CF_API_PAGE_SIZE))
+    for name, func in [("rowwise", validate_rowwise), ("batched", validate_batched)]:
+        seconds = min(timeit.repeat(lambda func=func: func(pages), number=1, repeat=REPEAT))
+        print(f"{name:>8}: {seconds * 1000:8.1f} ms  {ROW_COUNT / seconds:10.0f} rows/s")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Run the hot page, admin and scoring queries against a freshly migrated SQLite database and check their EXPLAIN QUERY
+PLAN.
+
+Fails when a page or admin query falls back to a full table scan, or when a refresh scoring step repeats a scan or a
+broad index range for every score row, so a dropped index or a reworded filter shows up before deploy.
+
+uv run python -m scripts.check_query_plans, or make check. The Docker image build runs it as well.
+"""
+
+import asyncio
+import re
+import sqlite3
+import sys
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.athlete.service import (
+    get_athlete_teams_dict,
+    get_athlete_teams_list,
+    get_team_composition_dict,
+    get_team_names,
+    get_year_affiliate_athletes,
+    rename_team,
+)
+from app.attendance.service import get_athletes_attendance
+from app.cf_games.service import apply_scoring_pipeline, recompute_athlete_event_scores, recompute_team_event_scores
+from app.database.base import Base
+from app.database.engine import SessionManager
+from app.database.migrations import migrate
+from app.database.models import DataVersion
+from app.score.models import Score, ScoreStaging
+from app.score.service import (
+    get_athlete_score_categories,
+    get_athlete_score_trend,
+    get_athlete_scores_page,
+    get_db_team_scores,
+    get_leaderboard_scores,
+    get_team_name_max_score,
+    get_team_score_trend,
+    get_total_scores,
+)
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+# Tables holding a single row, scanning them is the plan
+SINGLE_ROW_TABLES = {DataVersion.__tablename__}
+# Columns shared by many rows, an index range on only these is nearly a scan when repeated per row
+BROAD_COLUMNS = {"year", "affiliate_id", "ordinal", "event_name", "score_type"}
+
+
+async def run_page_queries(db_session: AsyncSession) -> None:
+    await get_db_team_scores(db_session=db_session, ordinal=1)
+    await get_total_scores(db_session=db_session)
+    await get_leaderboard_scores(db_session=db_session, ordinal=1)
+    await get_athlete_score_categories(db_session=db_session, ordinal=1)
+    await get_athlete_scores_page(db_session=db_session, ordinal=1, after=50)
+    await get_athlete_scores_page(db_session=db_session, ordinal=1, gender="M", mf_age_category="Open", after=50)
+    await get_team_name_max_score(db_session=db_session)
+    await get_athlete_score_trend(db_session=db_session, athlete_id=uuid.uuid4())
+    await get_team_score_trend(db_session=db_session, team_name="a")
+    await get_year_affiliate_athletes(db_session=db_session)
+    await get_athlete_teams_list(db_session=db_session)
+    await get_team_composition_dict(db_session=db_session)
+    await get_athlete_teams_dict(db_session=db_session)
+    await get_team_names(db_session=db_session)
+    await get_athletes_attendance(db_session=db_session, athletes=[{"id": uuid.uuid4(), "name": "a"}])
+    await rename_team(db_session=db_session, team_name_current="a", team_name_new="b")
+    await recompute_athlete_event_scores(db_session=db_session, athlete_id=uuid.uuid4(), ordinal=1)
+    await recompute_team_event_scores(db_session=db_session, team_name="a", event_name="26.1")
+
+
+async def run_scoring_pipeline(db_session: AsyncSession) -> None:
+    for score_model in (Score, ScoreStaging):
+        await apply_scoring_pipeline(db_session=db_session, score_model=score_model, engine="sql")
+        await apply_scoring_pipeline(db_session=db_session, score_model=score_model, engine="sql", ordinals={1})
+
+
+async def capture_statements(
+    session_manager: SessionManager,
+    queries: Callable[[AsyncSession], Awaitable[None]],
+) -> list[tuple[str, tuple]]:
+    statements: list[tuple[str, tuple]] = []
+
+    def before_cursor_execute(  # noqa: PLR0913
+        _conn,  # noqa: ANN001
+        _cursor,  # noqa: ANN001
+        statement: str,
+        parameters: tuple,
+        _context,  # noqa: ANN001
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+            statements.append((statement, tuple(parameters)))
+
+    event.listen(session_manager.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    async with session_manager.session() as db_session:
+        await queries(db_session)
+        await db_session.rollback()
+    event.remove(session_manager.engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def full_scans(plan: list[tuple]) -> list[str]:
+    """Plan rows reading a whole table without an index. Scans of subquery results are fine."""
+    tables = Base.metadata.tables.keys() - SINGLE_ROW_TABLES
+    return [
+        detail
+        for *_, detail in plan
+        if detail.startswith("SCAN ") and " USING " not in detail and detail.split()[1] in tables
+    ]
+
+
+def per_row_scans(plan: list[tuple]) -> list[str]:
+    """
+    Plan rows repeated for every row of an outer loop, i.e. inner loops of a join and loops of a correlated subquery,
+    that scan a table or only narrow it by broad columns. The outer loop of a scoring update scans all scores anyway.
+    """
+    tables = Base.metadata.tables.keys()
+    parents = {node: parent for node, parent, _, _ in plan}
+    details = {node: detail for node, _, _, detail in plan}
+    loops: dict[int, int] = {}
+    repeated = []
+    for node, parent, _, detail in plan:
+        if not detail.startswith(("SCAN ", "SEARCH ")):
+            continue
+        loops[parent] = loops.get(parent, 0) + 1
+        # SQLAlchemy aliases a table as <table>_<n>
+        if re.sub(r"_\d+$", "", detail.split()[1]) not in tables:
+            continue
+        ancestor, correlated = parent, False
+        while ancestor in details:
+            correlated |= details[ancestor].startswith("CORRELATED ")
+            ancestor = parents[ancestor]
+        if not (correlated or loops[parent] > 1):
+            continue
+        columns = {re.split("[=<>]", x)[0] for x in detail.partition("(")[2].rstrip(")").split(" AND ")}
+        if detail.startswith("SCAN ") or columns <= BROAD_COLUMNS:
+            repeated.append(detail)
+    return repeated
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "plans.db"
+        session_manager = SessionManager(f"sqlite+aiosqlite:///{path}")
+        async with session_manager.connect() as conn:
+            await conn.run_sync(migrate)
+        checks = [
+            (await capture_statements(session_manager, run_page_queries), full_scans, "FULL SCAN"),
+            (await capture_statements(session_manager, run_scoring_pipeline), per_row_scans, "PER ROW SCAN"),
+        ]
+        await session_manager.close()
+
+        count, failures = 0, 0
+        with sqlite3.connect(path) as conn:
+            for statements, check, label in checks:
+                for statement, parameters in dict.fromkeys(statements):
+                    plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                    scans = check(plan)
+                    count += 1
+                    failures += bool(scans)
+                    print(label if scans else "ok", " ".join(statement.split())[:200])  # noqa: T201
+                    for *_, detail in plan:
+                        print("   ", detail)  # noqa: T201
+
+    print(f"{count} statements, {failures} with full or per row table scans")  # noqa: T201
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,45 @@
+// Minimal htmx Server-Sent Events extension, attribute compatible with the htmx-ext-sse package.
+//   sse-connect="<url>"  opens an EventSource on the element, closed when htmx removes the element
+//   sse-swap="<event>"   swaps the event data into a descendant, using its hx-swap (innerHTML by default)
+//   hx-trigger="sse:<event>" on the element or a descendant fires that element's htmx request
+(function () {
+  var api;
+
+  function connect(elt) {
+    var source = new EventSource(api.getAttributeValue(elt, "sse-connect"));
+    api.getInternalData(elt).sseSource = source;
+
+    var targets = [elt].concat(Array.from(elt.querySelectorAll("[sse-swap], [hx-trigger*='sse:']")));
+    targets.forEach(function (target) {
+      var swapName = api.getAttributeValue(target, "sse-swap");
+      if (swapName) {
+        source.addEventListener(swapName, function (event) {
+          htmx.swap(target, event.data, api.getSwapSpecification(target));
+        });
+      }
+      var triggers = api.getAttributeValue(target, "hx-trigger") || "";
+      (triggers.match(/sse:[\w.-]+/g) || []).forEach(function (trigger) {
+        source.addEventListener(trigger.slice(4), function (event) {
+          htmx.trigger(target, trigger, { data: event.data });
+        });
+      });
+    });
+  }
+
+  htmx.defineExtension("sse", {
+    init: function (apiRef) {
+      api = apiRef;
+    },
+    onEvent: function (name, evt) {
+      var elt = evt.detail.elt;
+      if (!elt || !elt.hasAttribute || !elt.hasAttribute("sse-connect")) {
+        return;
+      }
+      if (name === "htmx:afterProcessNode" && !api.getInternalData(elt).sseSource) {
+        connect(elt);
+      } else if (name === "htmx:beforeCleanupElement" && api.getInternalData(elt).sseSource) {
+        api.getInternalData(elt).sseSource.close();
+      }
+    },
+  });
+})();